@@ -1,12 +1,29 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
+import bisect
 import boto3
+import csv
 import datetime
+import gzip
+import hashlib
+import io
+import itertools
+import ipaddress
 import json
+import queue
+from botocore.config import Config
 from botocore.exceptions import ClientError
 import re
 import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
 import os
 
 load_dotenv()
@@ -30,42 +47,579 @@ def is_valid_bucket_name(name):
 app = Flask(__name__)
 CORS(app)
 
-# Assumes default AWS creds or IAM role
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+# 'orjson' (default when installed) or 'json'
+JSON_ENCODER = os.getenv('JSON_ENCODER', 'orjson' if orjson is not None else 'json')
+
+def dumps_json(payload):
+    """Encode a payload to JSON bytes with the configured encoder"""
+    if JSON_ENCODER == 'orjson' and orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=str, separators=(',', ':')).encode('utf-8')
+
+def json_response(payload, status=200):
+    """Like jsonify, but through the configured (faster) encoder"""
+    return Response(dumps_json(payload), status=status, mimetype='application/json')
+
+def encode_json(payload):
+    """(body, gzipped body, etag) for a payload; the ETag is a hash of the body"""
+    body = dumps_json(payload)
+    return body, gzip.compress(body), hashlib.sha1(body).hexdigest()
+
+def _encoded_json_response(body, gzipped, etag):
+    """Serve pre-encoded JSON with an ETag, answering If-None-Match with 304"""
+    use_gzip = request.accept_encodings['gzip'] > 0
+    response = Response(gzipped if use_gzip else body, mimetype='application/json')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    # Each encoding is a different representation, so it needs its own tag
+    response.set_etag(etag + ('-gz' if use_gzip else ''))
+    return response.make_conditional(request)
+
+def requested_fields():
+    """Field names from ?fields=a,b,c, or None for every field"""
+    fields = request.args.get('fields')
+    return [field for field in fields.split(',') if field] if fields else None
+
+def project(record, fields):
+    """Keep only the requested fields of a response record"""
+    if not fields:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+# Prometheus metrics. Route latency comes from Flask request hooks and AWS
+# call metrics from botocore event hooks on the shared session, so every route
+# and every client is covered without per-route code. Under gunicorn, set
+# PROMETHEUS_MULTIPROC_DIR so /metrics aggregates all workers.
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Flask request latency', ['method', 'route', 'status']
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requests currently being handled', multiprocess_mode='livesum'
+)
+AWS_CALLS = Counter(
+    'aws_api_calls_total', 'AWS API calls', ['service', 'operation', 'region']
+)
+AWS_CALL_LATENCY = Histogram(
+    'aws_api_call_duration_seconds', 'AWS API call latency including retries', ['service', 'operation', 'region']
+)
+AWS_CALL_ERRORS = Counter(
+    'aws_api_call_errors_total', 'AWS API calls that failed', ['service', 'operation', 'region', 'error_code']
+)
+AWS_CALL_RETRIES = Counter(
+    'aws_api_call_retries_total', 'AWS API call retry attempts', ['service', 'operation', 'region']
+)
+AWS_CALL_THROTTLES = Counter(
+    'aws_api_call_throttles_total', 'Throttled AWS API attempts', ['service', 'operation', 'region']
+)
+THROTTLE_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'RequestLimitExceeded', 'RequestThrottled', 'SlowDown',
+    'ProvisionedThroughputExceededException', 'BandwidthLimitExceeded', 'PriorRequestNotComplete'
+}
+
+def _aws_call_labels(context):
+    return context.get('metrics_service', 'unknown'), context.get('metrics_operation', 'unknown'), \
+        context.get('client_region') or 'global'
+
+def _before_aws_call(model, context, **kwargs):
+    context['metrics_service'] = model.service_model.service_name
+    context['metrics_operation'] = model.name
+    context['metrics_started'] = time.perf_counter()
+
+def _after_aws_call(parsed, context, **kwargs):
+    labels = _aws_call_labels(context)
+    AWS_CALLS.labels(*labels).inc()
+    AWS_CALL_LATENCY.labels(*labels).observe(time.perf_counter() - context.get('metrics_started', time.perf_counter()))
+    retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+    if retries:
+        AWS_CALL_RETRIES.labels(*labels).inc(retries)
+    if 'Error' in parsed:
+        AWS_CALL_ERRORS.labels(*labels, parsed['Error'].get('Code', 'Unknown')).inc()
+
+def _after_aws_call_error(exception, context, **kwargs):
+    labels = _aws_call_labels(context)
+    AWS_CALLS.labels(*labels).inc()
+    AWS_CALL_LATENCY.labels(*labels).observe(time.perf_counter() - context.get('metrics_started', time.perf_counter()))
+    AWS_CALL_ERRORS.labels(*labels, type(exception).__name__).inc()
+
+def _aws_attempt(response, request_dict, **kwargs):
+    # Fires for every attempt, so throttles that were retried away still count
+    if response is not None and response[1].get('Error', {}).get('Code') in THROTTLE_ERROR_CODES:
+        AWS_CALL_THROTTLES.labels(*_aws_call_labels(request_dict.get('context', {}))).inc()
+
+def _instrument_session(session):
+    session.events.register('before-call', _before_aws_call)
+    session.events.register('after-call', _after_aws_call)
+    session.events.register('after-call-error', _after_aws_call_error)
+    session.events.register('needs-retry', _aws_attempt)
+
+@app.before_request
+def _start_request_metrics():
+    REQUESTS_IN_FLIGHT.inc()
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_LATENCY.labels(request.method, route, response.status_code).observe(
+        time.perf_counter() - g.request_started
+    )
+    g.request_observed = True
+    return response
+
+@app.teardown_request
+def _finish_request_metrics(exc):
+    if 'request_started' not in g:
+        return
+    REQUESTS_IN_FLIGHT.dec()
+    if not g.get('request_observed'):
+        # The view raised, so after_request never ran
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.labels(request.method, route, 500).observe(time.perf_counter() - g.request_started)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus exposition of route and AWS call metrics"""
+    registry = REGISTRY
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+# Shared boto3 clients, keyed by (service, region). Clients are thread-safe and
+# keep their own urllib3 connection pool, so reusing them across requests avoids
+# endpoint resolution, credential lookup and a new TLS handshake per call.
+AWS_CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '50')),
+    tcp_keepalive=True,
+    connect_timeout=int(os.getenv('AWS_CONNECT_TIMEOUT', '5')),
+    read_timeout=int(os.getenv('AWS_READ_TIMEOUT', '60')),
+    retries={'max_attempts': int(os.getenv('AWS_MAX_ATTEMPTS', '5')), 'mode': 'adaptive'}
+)
+
+_aws_session = None
+_aws_clients = {}
+_aws_clients_lock = threading.Lock()
+
+# Region names botocore knows an endpoint for, across every partition. Clients
+# are only created for these (or regions the account reports as enabled), so a
+# request for a made-up region cannot grow the client registry.
+def _known_regions():
+    session = boto3.session.Session()
+    return frozenset(region for partition in session.get_available_partitions()
+                     for region in session.get_available_regions('ec2', partition_name=partition))
+
+KNOWN_REGIONS = _known_regions()
+
+class UnknownRegionError(ValueError):
+    """Raised when a client is requested for a region AWS does not have"""
+
+    def __init__(self, region):
+        super().__init__(f"Unknown region: {region}")
+        self.region = region
+
+def _is_known_region(region):
+    return region in KNOWN_REGIONS or region in enabled_regions.loaded()
+
+def get_client(service, region=None):
+    """Return a pooled boto3 client for the service/region pair.
+
+    Assumes default AWS creds or IAM role. Role and SSO credentials are
+    refreshable, so the session renews them before they expire.
+    """
+    global _aws_session
+    key = (service, region)
+    client = _aws_clients.get(key)
+    if client is not None:
+        return client
+    # boto3 sessions are not thread-safe, so creation is serialised
+    with _aws_clients_lock:
+        client = _aws_clients.get(key)
+        if client is None:
+            if region is not None and not _is_known_region(region):
+                raise UnknownRegionError(region)
+            if _aws_session is None:
+                _aws_session = boto3.session.Session()
+                _instrument_session(_aws_session)
+            client = _aws_session.client(service, region_name=region, config=AWS_CLIENT_CONFIG)
+            _aws_clients[key] = client
+    return client
+
+def reset_aws_clients():
+    """Drop the pooled clients and session so fresh credentials are picked up"""
+    global _aws_session
+    with _aws_clients_lock:
+        _aws_clients.clear()
+        _aws_session = None
+
+@app.before_request
+def _check_region_arg():
+    # Reject unknown regions before any per-region state (clients, caches,
+    # pollers) is created for them
+    region = (request.view_args or {}).get('region')
+    if region is not None and not _is_known_region(region):
+        raise UnknownRegionError(region)
+
+@app.errorhandler(UnknownRegionError)
+def _unknown_region(e):
+    return jsonify({'error': str(e)}), 400
+
 def get_ec2_client(account_region='us-east-1'):
-    return boto3.client('ec2', region_name=account_region)
+    return get_client('ec2', account_region)
 
 def get_cloudwatch_client(account_region='us-east-1'):
-    return boto3.client('cloudwatch', region_name=account_region)
+    return get_client('cloudwatch', account_region)
+
+def _ensure_thread(thread, target, name, *args):
+    """Return thread if it is alive, otherwise start a daemon thread running target.
+
+    Background threads are started on first use rather than at import. A
+    thread from before a fork is not alive in the child, so each worker
+    process starts its own.
+    """
+    if thread is not None and thread.is_alive():
+        return thread
+    thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+    thread.start()
+    return thread
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+def _paginate(client, operation, result_key, **kwargs):
+    """Flatten every page of a paginated describe/list call"""
+    return [item for page in client.get_paginator(operation).paginate(**kwargs) for item in page[result_key]]
+
+FANOUT_MAX_WORKERS = int(os.getenv('FANOUT_MAX_WORKERS', '8'))
+FANOUT_TIMEOUT = float(os.getenv('FANOUT_TIMEOUT', '25'))
+
+def _run_parallel(tasks, max_workers=FANOUT_MAX_WORKERS, timeout=FANOUT_TIMEOUT):
+    """Run {key: callable} on a bounded pool.
+
+    Returns {key: {'status': 'ok'|'error'|'timeout', 'result'|'error', 'elapsed_ms'}}.
+    One failing task never fails the others.
+    """
+    if not tasks:
+        return {}
+
+    def timed(key, fn):
+        started = time.perf_counter()
+        try:
+            outcome = {'status': 'ok', 'result': fn()}
+        except Exception as e:
+            logger.warning(f"Parallel task {key} failed: {e}")
+            outcome = {'status': 'error', 'error': str(e)}
+        outcome['elapsed_ms'] = _elapsed_ms(started)
+        return outcome
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(tasks)))
+    try:
+        futures = {key: executor.submit(timed, key, fn) for key, fn in tasks.items()}
+        wait(futures.values(), timeout=timeout)
+    finally:
+        # Don't hold the request on stragglers; they are reported as timeouts
+        executor.shutdown(wait=False, cancel_futures=True)
+    return {
+        key: future.result() if future.done() and not future.cancelled()
+        else {'status': 'timeout', 'error': f'No response within {timeout}s'}
+        for key, future in futures.items()
+    }
+
+def _fan_out_regions(fetch, item_key):
+    """Call fetch(region) for every enabled region and merge the tagged results"""
+    regions = request.args.get('regions')
+    try:
+        regions = [r for r in regions.split(',') if r] if regions else _enabled_regions()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    unknown = [r for r in regions if not _is_known_region(r)]
+    if unknown:
+        return jsonify({'error': f"Unknown regions: {', '.join(unknown)}"}), 400
+    fields = requested_fields()
+    started = time.perf_counter()
+    outcomes = _run_parallel({region: (lambda region=region: fetch(region)) for region in regions})
+
+    items = []
+    report = {}
+    for region in regions:
+        outcome = outcomes[region]
+        if outcome['status'] == 'ok':
+            items.extend(project(dict(item, region=region), fields) for item in outcome['result'])
+            report[region] = {'status': 'ok', 'count': len(outcome['result']),
+                              'elapsed_ms': outcome['elapsed_ms']}
+        else:
+            report[region] = {k: v for k, v in outcome.items() if k != 'result'}
+    return json_response({
+        item_key: items,
+        'regions': report,
+        'elapsed_ms': _elapsed_ms(started)
+    })
+
+class TTLCache:
+    """Thread-safe in-memory cache with per-entry expiry.
+
+    get_or_load() runs at most one loader per key at a time; concurrent callers
+    for the same key wait for it instead of repeating the AWS call.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def set(self, key, value, ttl=None):
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+
+    def get_or_load(self, key, loader, ttl=None):
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key)
+            if value is None:
+                value = loader()
+                self.set(key, value, ttl)
+            return value
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+INVENTORY_CACHE_TTL = float(os.getenv('INVENTORY_CACHE_TTL', '30'))
+INVENTORY_MAX_STALE = float(os.getenv('INVENTORY_MAX_STALE', '300'))
+
+class InstanceInventory:
+    """Per-region describe_instances snapshot shared by every inventory route.
+
+    A snapshot younger than the TTL is served as is. An older one is still
+    served for up to INVENTORY_MAX_STALE seconds while a background thread
+    refreshes it; past that the caller fetches synchronously. Mutating routes
+    call invalidate() so the next read sees their changes.
+    """
+
+    def __init__(self, ttl=INVENTORY_CACHE_TTL, max_stale=INVENTORY_MAX_STALE):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._snapshots = {}
+        self._generations = {}
+        self._versions = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._region_locks = {}
+
+    def _fetch(self, region):
+        with self._lock:
+            generation = self._generations.get(region, 0)
+        ec2 = get_ec2_client(region)
+        instances = {}
+        for page, _ in _iter_instance_pages(ec2):
+            for inst in page:
+                instances[inst['InstanceId']] = inst
+        snapshot = {'instances': instances, 'fetched_at': time.time()}
+        with self._lock:
+            # Versions keep counting across invalidations so they never repeat.
+            # A result that an invalidation overtook still gets one, but is
+            # only returned to this caller, never stored.
+            snapshot['version'] = self._versions[region] = self._versions.get(region, 0) + 1
+            if self._generations.get(region, 0) == generation:
+                self._snapshots[region] = snapshot
+        return snapshot
+
+    def _refresh(self, region, max_age=None):
+        with self._lock:
+            region_lock = self._region_locks.setdefault(region, threading.Lock())
+        with region_lock:
+            snapshot = self._snapshots.get(region)
+            if snapshot and time.time() - snapshot['fetched_at'] < (self.ttl if max_age is None else max_age):
+                return snapshot
+            return self._fetch(region)
+
+    def _refresh_in_background(self, region):
+        with self._lock:
+            if region in self._refreshing:
+                return
+            self._refreshing.add(region)
+
+        def run():
+            try:
+                self._refresh(region)
+            except Exception as e:
+                logger.warning(f"Background inventory refresh failed for {region}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(region)
+
+        threading.Thread(target=run, name=f'inventory-refresh-{region}', daemon=True).start()
+
+    def snapshot(self, region, max_age=None):
+        """Current snapshot; max_age forces a synchronous refetch of anything older"""
+        snapshot = self._snapshots.get(region)
+        if max_age is not None and (not snapshot or time.time() - snapshot['fetched_at'] >= max_age):
+            return self._refresh(region, max_age)
+        if snapshot:
+            age = time.time() - snapshot['fetched_at']
+            if age < self.ttl:
+                return snapshot
+            if age < self.ttl + self.max_stale:
+                self._refresh_in_background(region)
+                return snapshot
+        return self._refresh(region)
+
+    def instances(self, region):
+        return list(self.snapshot(region)['instances'].values())
+
+    def get_instance(self, region, instance_id):
+        """Raw instance record; falls back to a direct lookup for instances newer than the snapshot"""
+        inst = self.snapshot(region)['instances'].get(instance_id)
+        if inst is not None:
+            return inst
+        response = get_ec2_client(region).describe_instances(InstanceIds=[instance_id])
+        if not response['Reservations']:
+            return None
+        # The snapshot is missing this instance, so rebuild it on the next read
+        self.invalidate(region)
+        return response['Reservations'][0]['Instances'][0]
+
+    def invalidate(self, region=None):
+        with self._lock:
+            regions = list(self._snapshots) if region is None else [region]
+            for name in regions:
+                self._generations[name] = self._generations.get(name, 0) + 1
+                self._snapshots.pop(name, None)
+
+instance_inventory = InstanceInventory()
+
+HEALTH_PROBE_INTERVAL = float(os.getenv('HEALTH_PROBE_INTERVAL', '30'))
+HEALTH_PROBE_TIMEOUT = float(os.getenv('HEALTH_PROBE_TIMEOUT', '10'))
+HEALTH_FAILURE_THRESHOLD = int(os.getenv('HEALTH_FAILURE_THRESHOLD', '3'))
+ANSIBLE_API_HEALTH_URL = os.getenv('ANSIBLE_API_HEALTH_URL', 'http://43.204.109.213:8000/health')
+# Probes that must be healthy for /health/ready to return 200
+READINESS_PROBES = [name for name in os.getenv('READINESS_PROBES', 'aws').split(',') if name]
+
+def _probe_aws():
+    # Same call the region list needs, so the probe keeps that fresh as well
+    regions = enabled_regions.refresh()
+    return f"Connected - {len(regions)} regions available", None
+
+def _probe_ansible_api():
+    import requests
+    response = requests.get(ANSIBLE_API_HEALTH_URL, timeout=5)
+    if response.status_code != 200:
+        raise RuntimeError(f"Ansible API returned HTTP {response.status_code}")
+    return 'Ansible API healthy', response.json()
+
+class HealthMonitor:
+    """Connectivity probes run on a background thread; health routes read the last results.
+
+    Probe traffic is one round per HEALTH_PROBE_INTERVAL however often the
+    load balancer polls. A probe that was healthy is only reported down
+    after HEALTH_FAILURE_THRESHOLD failures in a row, so a single slow AWS
+    call does not take the pod out of rotation.
+    """
+
+    def __init__(self, probes, interval=HEALTH_PROBE_INTERVAL, failure_threshold=HEALTH_FAILURE_THRESHOLD):
+        self.probes = probes
+        self.interval = interval
+        self.failure_threshold = failure_threshold
+        self._results = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self):
+        outcomes = _run_parallel(self.probes, timeout=HEALTH_PROBE_TIMEOUT)
+        checked_at = datetime.datetime.utcnow().isoformat()
+        for name, outcome in outcomes.items():
+            previous = self._results.get(name, {})
+            if outcome['status'] == 'ok':
+                message, detail = outcome['result']
+                result = {'healthy': True, 'message': message, 'detail': detail, 'consecutive_failures': 0}
+            else:
+                failures = previous.get('consecutive_failures', 0) + 1
+                result = {
+                    'healthy': previous.get('healthy', False) and failures < self.failure_threshold,
+                    'message': f"{name} probe failed: {outcome['error']}",
+                    'detail': None,
+                    'consecutive_failures': failures
+                }
+            result['latency_ms'] = outcome.get('elapsed_ms', HEALTH_PROBE_TIMEOUT * 1000)
+            result['checked_at'] = checked_at
+            self._results[name] = result
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Health probe round failed: {e}")
+
+    def results(self):
+        """Latest result per probe; the first call probes inline and starts the refresher"""
+        with self._lock:
+            if not self._results:
+                self.refresh()
+            self._thread = _ensure_thread(self._thread, self._loop, 'health-probes')
+        return dict(self._results)
+
+health_monitor = HealthMonitor({'aws': _probe_aws, 'ansible_api': _probe_ansible_api})
+
+@app.route('/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness: answers as long as the process serves requests; does no I/O"""
+    return jsonify({'status': 'alive', 'timestamp': datetime.datetime.utcnow().isoformat()})
+
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness from the background probes; 503 while a READINESS_PROBES probe is down"""
+    probes = health_monitor.results()
+    ready = all(probes.get(name, {}).get('healthy') for name in READINESS_PROBES)
+    return jsonify({
+        'status': 'ready' if ready else 'not ready',
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'required': READINESS_PROBES,
+        'probes': probes
+    }), 200 if ready else 503
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    try:
-        # Test AWS connectivity
-        ec2 = get_ec2_client('us-east-1')
-        regions = ec2.describe_regions()
-        aws_connected = True
-        aws_message = f"Connected - {len(regions['Regions'])} regions available"
-    except Exception as e:
-        aws_connected = False
-        aws_message = f"AWS connection failed: {str(e)}"
-        
+    aws = health_monitor.results()['aws']
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.datetime.utcnow().isoformat(),
         'service': 'EC2 Management API',
         'version': '1.2.0',
         'aws_connectivity': {
-            'connected': aws_connected,
-            'message': aws_message
+            'connected': aws['healthy'],
+            'message': aws['message'],
+            'checked_at': aws['checked_at'],
+            'latency_ms': aws['latency_ms']
         }
     })
+
 @app.route('/ansible-api/health', methods=['GET'])
 def check_ansible_api():
     """Proxy health check to Ansible API"""
     try:
         import requests
-        response = requests.get('http://43.204.109.213:8000/health', timeout=5)
+        response = requests.get(ANSIBLE_API_HEALTH_URL, timeout=5)
         return jsonify({
             'ansible_api_status': 'healthy' if response.status_code == 200 else 'unhealthy',
             'ansible_api_response': response.json() if response.status_code == 200 else None,
@@ -79,107 +633,764 @@ def check_ansible_api():
         }), 500
 
 
+def _instance_summary(inst):
+    """Shape a raw describe_instances record for the instance list"""
+    cpu = None  # removed from list_instances for performance; fetched separately
+    name = next((tag['Value'] for tag in inst.get('Tags', []) if tag['Key'] == 'Name'), None)
+    return {
+        'id': inst['InstanceId'],
+        'name': name,
+        'type': inst['InstanceType'],
+        'state': inst['State']['Name'],
+        'az': inst['Placement']['AvailabilityZone'],
+        'volumes': [v['Ebs']['VolumeId'] for v in inst.get('BlockDeviceMappings', []) if 'Ebs' in v],
+        'tags': inst.get('Tags', []),
+        'role': inst.get('IamInstanceProfile', {}).get('Arn', 'None'),
+        'cpu': cpu,
+    }
+
+def _iter_instance_pages(ec2, max_items=None, starting_token=None, **kwargs):
+    """Yield (instances, page_iterator) per describe_instances page"""
+    pagination = {}
+    if max_items:
+        # MaxItems counts reservations, the paginator's result key
+        pagination['MaxItems'] = max_items
+    if starting_token:
+        pagination['StartingToken'] = starting_token
+    pages = ec2.get_paginator('describe_instances').paginate(PaginationConfig=pagination, **kwargs)
+    for page in pages:
+        yield [inst for res in page['Reservations'] for inst in res['Instances']], pages
+
+def _fetch_instances(region):
+    return [_instance_summary(inst) for inst in instance_inventory.instances(region)]
+
+_instance_list_bodies = {}
+
+def _encoded_instance_list(region, fields):
+    """Encoded instance list, built once per inventory snapshot and field selection"""
+    snapshot = instance_inventory.snapshot(region)
+    key = (region, tuple(fields) if fields else None)
+    cached = _instance_list_bodies.get(key)
+    if cached is None or cached[0] != snapshot['version']:
+        items = [project(_instance_summary(inst), fields) for inst in snapshot['instances'].values()]
+        cached = (snapshot['version'], encode_json(items))
+        if len(_instance_list_bodies) > 1024:
+            _instance_list_bodies.clear()
+        _instance_list_bodies[key] = cached
+    return cached[1]
+
+@app.route('/instances/all', methods=['GET'])
+def list_instances_all_regions():
+    """Instances from every enabled region (or ?regions=a,b), fetched concurrently"""
+    return _fan_out_regions(_fetch_instances, 'instances')
+
 @app.route('/instances/<region>', methods=['GET'])
 def list_instances(region):
+    """List instances in a region.
+
+    Query params:
+      limit       - maximum reservations to return; enables paged output
+      next_token  - resume token from a previous paged response
+      stream      - 'ndjson' for one instance per line, 'array' for a chunked JSON array
+      refresh     - 'true' to bypass the shared inventory cache
+      fields      - comma separated fields to return, e.g. id,name,state
+
+    Paged and streamed reads go straight to EC2; the plain list is served
+    from the shared inventory cache with an ETag, so pollers sending
+    If-None-Match get a 304 until the instances change.
+    """
+    limit = request.args.get('limit', type=int)
+    if 'limit' in request.args and (limit is None or limit <= 0):
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    next_token = request.args.get('next_token')
+    stream = request.args.get('stream')
+    fields = requested_fields()
     ec2 = get_ec2_client(region)
-    instances = ec2.describe_instances()
-    output = []
-
-    for res in instances['Reservations']:
-        for inst in res['Instances']:
-            cpu = None  # removed from list_instances for performance; fetched separately
-            name = next((tag['Value'] for tag in inst.get('Tags', []) if tag['Key'] == 'Name'), None)
-            output.append({
-                'id': inst['InstanceId'],
-                'name': name,
-                'type': inst['InstanceType'],
-                'state': inst['State']['Name'],
-                'az': inst['Placement']['AvailabilityZone'],
-                'volumes': [v['Ebs']['VolumeId'] for v in inst.get('BlockDeviceMappings', [])],
-                'tags': inst.get('Tags', []),
-                'role': inst.get('IamInstanceProfile', {}).get('Arn', 'None'),
-                'cpu': cpu,
-            })
-    return jsonify(output)
+
+    if stream in ('ndjson', 'array'):
+        # Fetch the first page up front so a bad token or AWS error still
+        # gets a proper status instead of a truncated 200 stream
+        pages = _iter_instance_pages(ec2, limit, next_token)
+        try:
+            first_page = next(pages, None)
+        except ValueError:
+            return jsonify({'error': 'Invalid next_token'}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+        def generate():
+            first = True
+            if stream == 'array':
+                yield b'['
+            if first_page is not None:
+                for instances, _ in itertools.chain([first_page], pages):
+                    for inst in instances:
+                        item = dumps_json(project(_instance_summary(inst), fields))
+                        if stream == 'ndjson':
+                            yield item + b'\n'
+                        else:
+                            yield item if first else b',' + item
+                        first = False
+            if stream == 'array':
+                yield b']'
+        mimetype = 'application/x-ndjson' if stream == 'ndjson' else 'application/json'
+        return Response(stream_with_context(generate()), mimetype=mimetype)
+
+    if limit or next_token:
+        output = []
+        pages = None
+        try:
+            for instances, pages in _iter_instance_pages(ec2, limit, next_token):
+                output.extend(project(_instance_summary(inst), fields) for inst in instances)
+        except ValueError:
+            return jsonify({'error': 'Invalid next_token'}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        return json_response({
+            'instances': output,
+            'next_token': pages.resume_token if pages is not None else None
+        })
+
+    if request.args.get('refresh') == 'true':
+        instance_inventory.invalidate(region)
+    try:
+        return _encoded_json_response(*_encoded_instance_list(region, fields))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+JOB_MAX_PER_REGION = int(os.getenv('JOB_MAX_PER_REGION', '2'))
+JOB_RETENTION = float(os.getenv('JOB_RETENTION', '3600'))
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', './db/jobs.sqlite3')
+JOB_HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', '15'))
+JOB_STALE_AFTER = float(os.getenv('JOB_STALE_AFTER', '120'))
+
+def _sqlite_connection(local, path, schema):
+    """Per-thread connection to a SQLite file shared by every worker process"""
+    conn = getattr(local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(schema)
+        local.conn = conn
+    return conn
+
+class JobManager:
+    """Runs long instance operations off the request thread.
+
+    Each job is a list of steps run in order on a per-region pool, so at most
+    JOB_MAX_PER_REGION jobs touch a region at once and a burst of resizes
+    can't tie up web workers. A step is (name, callable) or (name, callable,
+    undo). If a later step fails, the undo callables of the completed steps
+    run in reverse order. Job state is kept in a SQLite file at
+    JOB_STORE_PATH, so any worker process can answer a status poll.
+
+    Jobs run in the process that accepted them, which stamps its unfinished
+    jobs every JOB_HEARTBEAT_INTERVAL seconds. A job with no heartbeat for
+    JOB_STALE_AFTER seconds lost its worker (crash, restart, deploy) and is
+    reported as failed, then pruned like any other finished job.
+    """
+
+    def __init__(self, path=JOB_STORE_PATH, max_per_region=JOB_MAX_PER_REGION, retention=JOB_RETENTION,
+                 heartbeat_interval=JOB_HEARTBEAT_INTERVAL, stale_after=JOB_STALE_AFTER):
+        self.path = path
+        self.max_per_region = max_per_region
+        self.retention = retention
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self._local = threading.local()
+        self._executors = {}
+        self._active = {}
+        self._heartbeat = None
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        return _sqlite_connection(
+            self._local, self.path,
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' id TEXT PRIMARY KEY, region TEXT, created_at TEXT, finished_at TEXT, payload TEXT)'
+        )
+
+    def _save(self, job):
+        job['heartbeat_at'] = datetime.datetime.utcnow().isoformat()
+        with self._conn() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?)',
+                (job['id'], job['region'], job['created_at'], job['finished_at'], json.dumps(job, default=str))
+            )
+
+    def _executor(self, region):
+        # Created on first use so pools are never inherited across a fork
+        with self._lock:
+            executor = self._executors.get(region)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=self.max_per_region,
+                                              thread_name_prefix=f'jobs-{region}')
+                self._executors[region] = executor
+            return executor
+
+    def submit(self, kind, region, target, steps):
+        """Queue steps; the last step's return value is the job result"""
+        self._prune()
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'region': region,
+            'target': target,
+            'status': 'queued',
+            'steps': [step[0] for step in steps],
+            'current_step': None,
+            'progress': {'completed': 0, 'total': len(steps)},
+            'result': None,
+            'error': None,
+            'rolled_back': [],
+            'rollback_errors': [],
+            'created_at': datetime.datetime.utcnow().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'owner_pid': os.getpid(),
+            'heartbeat_at': None
+        }
+        self._save(job)
+        accepted = dict(job, progress=dict(job['progress']))
+        with self._lock:
+            self._active[job['id']] = job
+            self._heartbeat = _ensure_thread(self._heartbeat, self._beat, 'job-heartbeat')
+        self._executor(region).submit(self._run, job, steps)
+        return accepted
+
+    def _beat(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            # A forked worker inherits the parent's table but not its jobs
+            pid = os.getpid()
+            now = datetime.datetime.utcnow().isoformat()
+            beats = [(now, job_id) for job_id, job in list(self._active.items()) if job['owner_pid'] == pid]
+            if not beats:
+                continue
+            try:
+                with self._conn() as conn:
+                    conn.executemany(
+                        "UPDATE jobs SET payload = json_set(payload, '$.heartbeat_at', ?)"
+                        ' WHERE id = ? AND finished_at IS NULL', beats
+                    )
+            except Exception as e:
+                logger.warning(f"Job heartbeat failed: {e}")
+
+    def _run(self, job, steps):
+        job['status'] = 'running'
+        job['started_at'] = datetime.datetime.utcnow().isoformat()
+        self._save(job)
+        completed = []
+        try:
+            for step in steps:
+                job['current_step'] = step[0]
+                self._save(job)
+                job['result'] = step[1]()
+                completed.append(step)
+                job['progress']['completed'] += 1
+            job['status'] = 'succeeded'
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['kind']} {job['target']}) failed at {job['current_step']}: {e}")
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            self._undo(job, completed)
+        finally:
+            job['current_step'] = None
+            job['finished_at'] = datetime.datetime.utcnow().isoformat()
+            self._save(job)
+            self._active.pop(job['id'], None)
+            instance_inventory.invalidate(job['region'])
+
+    def _undo(self, job, completed):
+        for step in reversed(completed):
+            if len(step) < 3:
+                continue
+            try:
+                step[2]()
+                job['rolled_back'].append(step[0])
+            except Exception as e:
+                logger.error(f"Job {job['id']} could not undo {step[0]}: {e}")
+                job['rollback_errors'].append(f'{step[0]}: {e}')
+
+    def _expire(self, job):
+        """Mark an unfinished job failed if its worker stopped heartbeating"""
+        if job['finished_at'] is not None:
+            return job
+        last_beat = job.get('heartbeat_at') or job['created_at']
+        idle = datetime.datetime.utcnow() - datetime.datetime.fromisoformat(last_beat)
+        if idle.total_seconds() > self.stale_after:
+            job['status'] = 'failed'
+            job['error'] = (f"Worker {job.get('owner_pid')} stopped reporting progress at {last_beat}; "
+                            'the job was abandoned and the instance may need checking')
+            job['current_step'] = None
+            job['finished_at'] = datetime.datetime.utcnow().isoformat()
+            self._save(job)
+        return job
+
+    def get(self, job_id):
+        row = self._conn().execute('SELECT payload FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._expire(json.loads(row[0])) if row else None
+
+    def jobs(self, region=None):
+        query = 'SELECT payload FROM jobs'
+        params = ()
+        if region is not None:
+            query += ' WHERE region = ?'
+            params = (region,)
+        rows = self._conn().execute(query + ' ORDER BY created_at', params).fetchall()
+        return [self._expire(json.loads(payload)) for payload, in rows]
+
+    def _prune(self):
+        unfinished = self._conn().execute('SELECT payload FROM jobs WHERE finished_at IS NULL').fetchall()
+        for payload, in unfinished:
+            self._expire(json.loads(payload))
+        cutoff = (datetime.datetime.utcnow() - datetime.timedelta(seconds=self.retention)).isoformat()
+        with self._conn() as conn:
+            conn.execute('DELETE FROM jobs WHERE finished_at < ?', (cutoff,))
+
+job_manager = JobManager()
+
+def _wants_async():
+    return request.args.get('async') == 'true'
+
+def _accepted(job, message):
+    return jsonify({'status': 'accepted', 'message': message, 'job_id': job['id'], 'job': job}), 202
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify(job_manager.jobs(request.args.get('region')))
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
 
 @app.route('/instance/<region>/<instance_id>/resize', methods=['POST'])
 def resize_instance(region, instance_id):
-    data = request.json
-    new_type = data['instance_type']
+    """Queue a stop -> modify -> start resize and return its job immediately"""
+    data = request.json or {}
+    new_type = data.get('instance_type')
+    if not new_type:
+        return jsonify({'error': 'instance_type is required'}), 400
 
     ec2 = get_ec2_client(region)
-    ec2.stop_instances(InstanceIds=[instance_id])
-    waiter = ec2.get_waiter('instance_stopped')
-    waiter.wait(InstanceIds=[instance_id])
+    original = {}
+
+    def restart():
+        ec2.get_waiter('instance_stopped').wait(InstanceIds=[instance_id])
+        ec2.start_instances(InstanceIds=[instance_id])
+
+    def modify():
+        original['type'] = ec2.describe_instance_attribute(
+            InstanceId=instance_id, Attribute='instanceType'
+        )['InstanceType']['Value']
+        ec2.modify_instance_attribute(InstanceId=instance_id, InstanceType={'Value': new_type})
+
+    def restore_type():
+        ec2.modify_instance_attribute(InstanceId=instance_id, InstanceType={'Value': original['type']})
+
+    def start():
+        ec2.start_instances(InstanceIds=[instance_id])
+        return f'Resized {instance_id} to {new_type}'
+
+    # A failure after the stop puts the old type back and restarts the instance
+    steps = [
+        ('stop', lambda: ec2.stop_instances(InstanceIds=[instance_id]), restart),
+        ('wait_stopped', lambda: ec2.get_waiter('instance_stopped').wait(InstanceIds=[instance_id])),
+        ('modify', modify, restore_type),
+        ('start', start)
+    ]
+    job = job_manager.submit('resize', region, instance_id, steps)
+    return _accepted(job, f'Resize of {instance_id} to {new_type} queued')
+
+def _instance_action(region, instance_id, action, call, past_tense):
+    """Run start/stop/terminate inline, or as a job with ?async=true"""
+    ec2 = get_ec2_client(region)
 
-    ec2.modify_instance_attribute(InstanceId=instance_id, InstanceType={'Value': new_type})
-    ec2.start_instances(InstanceIds=[instance_id])
+    def run():
+        getattr(ec2, call)(InstanceIds=[instance_id])
+        return f'{past_tense} {instance_id}'
 
-    return jsonify({'status': 'success', 'message': f'Resized {instance_id} to {new_type}'})
+    if _wants_async():
+        job = job_manager.submit(action, region, instance_id, [(action, run)])
+        return _accepted(job, f'{action.capitalize()} of {instance_id} queued')
+    message = run()
+    instance_inventory.invalidate(region)
+    return jsonify({'status': 'success', 'message': message})
 
 @app.route('/instance/<region>/<instance_id>/terminate', methods=['POST'])
 def terminate_instance(region, instance_id):
-    ec2 = get_ec2_client(region)
-    ec2.terminate_instances(InstanceIds=[instance_id])
-    return jsonify({'status': 'success', 'message': f'Terminated {instance_id}'})
+    return _instance_action(region, instance_id, 'terminate', 'terminate_instances', 'Terminated')
 
 @app.route('/instance/<region>/<instance_id>/start', methods=['POST'])
 def start_instance(region, instance_id):
-    ec2 = get_ec2_client(region)
-    ec2.start_instances(InstanceIds=[instance_id])
-    return jsonify({'status': 'success', 'message': f'Started {instance_id}'})
+    return _instance_action(region, instance_id, 'start', 'start_instances', 'Started')
 
 @app.route('/instance/<region>/<instance_id>/stop', methods=['POST'])
 def stop_instance(region, instance_id):
+    return _instance_action(region, instance_id, 'stop', 'stop_instances', 'Stopped')
+
+BULK_ACTION_BATCH_SIZE = int(os.getenv('BULK_ACTION_BATCH_SIZE', '100'))
+BULK_ACTIONS = {
+    'start': ('start_instances', 'StartingInstances'),
+    'stop': ('stop_instances', 'StoppingInstances'),
+    'terminate': ('terminate_instances', 'TerminatingInstances')
+}
+
+def _bulk_region_action(region, instance_ids, action):
+    """Apply an action to a region's instances in batches; returns {instance_id: result}"""
+    call, result_key = BULK_ACTIONS[action]
     ec2 = get_ec2_client(region)
-    ec2.stop_instances(InstanceIds=[instance_id])
-    return jsonify({'status': 'success', 'message': f'Stopped {instance_id}'})
+    results = {}
+
+    def apply(batch):
+        response = getattr(ec2, call)(InstanceIds=batch)
+        for change in response[result_key]:
+            results[change['InstanceId']] = {
+                'status': 'success',
+                'previous_state': change['PreviousState']['Name'],
+                'current_state': change['CurrentState']['Name']
+            }
+
+    try:
+        for i in range(0, len(instance_ids), BULK_ACTION_BATCH_SIZE):
+            batch = instance_ids[i:i + BULK_ACTION_BATCH_SIZE]
+            try:
+                apply(batch)
+            except ClientError as e:
+                if len(batch) == 1:
+                    results[batch[0]] = {'status': 'error', 'error': str(e)}
+                    continue
+                # One bad ID fails the whole batch; retry one by one to isolate it
+                for instance_id in batch:
+                    try:
+                        apply([instance_id])
+                    except ClientError as e:
+                        results[instance_id] = {'status': 'error', 'error': str(e)}
+    finally:
+        instance_inventory.invalidate(region)
+    return results
+
+@app.route('/instances/bulk/<action>', methods=['POST'])
+def bulk_instance_action(action):
+    """Start, stop or terminate many instances, possibly across regions.
+
+    Body: {"instances": [{"region": "...", "instance_id": "..."}, ...]}
+      or  {"region": "...", "instance_ids": [...]}
+    IDs are grouped into batched calls per region and the regions run
+    concurrently. Returns a result and state transition per instance.
+    """
+    if action not in BULK_ACTIONS:
+        return jsonify({'error': f'Unsupported action {action}'}), 404
+
+    data = request.json or {}
+    instances = data.get('instances', [])
+    instance_ids = data.get('instance_ids', [])
+    well_formed = (
+        isinstance(instances, list) and isinstance(instance_ids, list)
+        and all(isinstance(item, dict) and isinstance(item.get('region'), str)
+                and isinstance(item.get('instance_id'), str) for item in instances)
+        and all(isinstance(instance_id, str) for instance_id in instance_ids)
+        and isinstance(data.get('region', ''), str)
+    )
+    if not well_formed:
+        return jsonify({'error': 'Each instance needs a region and an instance_id'}), 400
+
+    by_region = {}
+    for item in instances:
+        by_region.setdefault(item['region'], []).append(item['instance_id'])
+    if data.get('region'):
+        by_region.setdefault(data['region'], []).extend(instance_ids)
+    by_region = {region: list(dict.fromkeys(i for i in ids if i)) for region, ids in by_region.items()}
+    if not by_region or None in by_region or not any(by_region.values()):
+        return jsonify({'error': 'Each instance needs a region and an instance_id'}), 400
+    unknown = [region for region in by_region if not _is_known_region(region)]
+    if unknown:
+        return jsonify({'error': f"Unknown regions: {', '.join(unknown)}"}), 400
+
+    outcomes = _run_parallel({
+        region: (lambda region=region, ids=ids: _bulk_region_action(region, ids, action))
+        for region, ids in by_region.items()
+    })
+
+    results = []
+    for region, ids in by_region.items():
+        outcome = outcomes[region]
+        for instance_id in ids:
+            if outcome['status'] == 'ok':
+                result = outcome['result'].get(instance_id, {'status': 'error', 'error': 'No state change reported'})
+            else:
+                result = {'status': 'error', 'error': outcome['error']}
+            results.append(dict(result, region=region, instance_id=instance_id))
+
+    succeeded = sum(1 for r in results if r['status'] == 'success')
+    return jsonify({
+        'action': action,
+        'results': results,
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded
+    })
+
+def _fetch_alarms(region):
+    cw = get_cloudwatch_client(region)
+    alert_list = []
+    for page in cw.get_paginator('describe_alarms').paginate(StateValue='ALARM'):
+        for alarm in page.get('MetricAlarms', []):
+            alert_list.append({
+                'name': alarm['AlarmName'],
+                'namespace': alarm['Namespace'],
+                'metric': alarm['MetricName'],
+                'dimensions': alarm.get('Dimensions', []),
+                'state': alarm['StateValue'],
+                'region': region
+            })
+    return alert_list
+
+@app.route('/alarms/all', methods=['GET'])
+def get_alarms_all_regions():
+    """Alarms in ALARM state from every enabled region, fetched concurrently"""
+    return _fan_out_regions(_fetch_alarms, 'alarms')
+
+# Short-lived encoded bodies for the polled alarm and bucket lists. Polls
+# inside the TTL reuse the body; an unchanged list keeps its ETag across
+# refreshes, so If-None-Match still gets a 304 afterwards.
+POLL_CACHE_TTL = float(os.getenv('POLL_CACHE_TTL', '15'))
+poll_cache = TTLCache(POLL_CACHE_TTL)
 
 @app.route('/alarms/<region>', methods=['GET'])
 def get_alarms(region):
     try:
-        cw = get_cloudwatch_client(region)
-        alarms = cw.describe_alarms(StateValue='ALARM')
+        encoded = poll_cache.get_or_load(('alarms', region), lambda: encode_json(_fetch_alarms(region)))
     except Exception as e:
         print(f"[ERROR] Failed to get alarms for {region}: {e}")
         return jsonify([])
+    return _encoded_json_response(*encoded)
+
+STREAM_POLL_INTERVAL = float(os.getenv('STREAM_POLL_INTERVAL', '10'))
+STREAM_HEARTBEAT = float(os.getenv('STREAM_HEARTBEAT', '15'))
+STREAM_QUEUE_SIZE = int(os.getenv('STREAM_QUEUE_SIZE', '100'))
+
+def _diff(previous, current):
+    """{changed, removed} between two {key: record} maps, or None if they match"""
+    changed = [record for key, record in current.items() if previous.get(key) != record]
+    removed = [key for key in previous if key not in current]
+    if changed or removed:
+        return {'changed': changed, 'removed': removed}
+    return None
+
+class ChangeStream:
+    """One background poller per region pushing instance and alarm changes to subscribers.
+
+    A region's poller starts with its first subscriber and stops once the
+    last one leaves, so AWS load grows with the regions being watched, not
+    with the number of open dashboards. Instances are read through the
+    shared inventory, so the stream also keeps the cached routes fresh.
+    """
 
-    alert_list = []
-    for alarm in alarms.get('MetricAlarms', []):
-        alert_list.append({
-            'name': alarm['AlarmName'],
-            'namespace': alarm['Namespace'],
-            'metric': alarm['MetricName'],
-            'dimensions': alarm.get('Dimensions', []),
-            'state': alarm['StateValue'],
-            'region': region
-        })
-    return jsonify(alert_list)
+    def __init__(self, interval=STREAM_POLL_INTERVAL):
+        self.interval = interval
+        self._subscribers = {}
+        self._pollers = {}
+        self._state = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _snapshot_event(state):
+        return {'instances': list(state['instances'].values()), 'alarms': list(state['alarms'].values())}
+
+    def subscribe(self, region):
+        subscriber = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        with self._lock:
+            state = self._state.get(region)
+            if state is not None:
+                subscriber.put_nowait(('snapshot', self._snapshot_event(state)))
+            self._subscribers.setdefault(region, set()).add(subscriber)
+            self._pollers[region] = _ensure_thread(
+                self._pollers.get(region), self._poll, f'change-stream-{region}', region
+            )
+        return subscriber
+
+    def unsubscribe(self, region, subscriber):
+        with self._lock:
+            self._subscribers.get(region, set()).discard(subscriber)
+
+    def _publish(self, region, event, data, state=None):
+        with self._lock:
+            subscribers = list(self._subscribers.get(region, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event, data))
+            except queue.Full:
+                # Too far behind: swap the backlog for one full snapshot
+                while not subscriber.empty():
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        break
+                if state is not None:
+                    subscriber.put_nowait(('snapshot', self._snapshot_event(state)))
+
+    def _tick(self, region):
+        snapshot = instance_inventory.snapshot(region, max_age=self.interval)
+        instances = {inst['InstanceId']: _instance_summary(inst) for inst in snapshot['instances'].values()}
+        alarms = {alarm['name']: alarm for alarm in _fetch_alarms(region)}
+        with self._lock:
+            previous = self._state.get(region)
+            state = self._state[region] = {'instances': instances, 'alarms': alarms}
+        if previous is None:
+            self._publish(region, 'snapshot', self._snapshot_event(state), state)
+            return
+        for key in ('instances', 'alarms'):
+            changes = _diff(previous[key], state[key])
+            if changes:
+                self._publish(region, key, changes, state)
+
+    def _poll(self, region):
+        while True:
+            with self._lock:
+                if not self._subscribers.get(region):
+                    self._subscribers.pop(region, None)
+                    self._pollers.pop(region, None)
+                    self._state.pop(region, None)
+                    return
+            try:
+                self._tick(region)
+            except Exception as e:
+                logger.warning(f"Change stream poll failed for {region}: {e}")
+                self._publish(region, 'error', {'error': str(e)})
+            time.sleep(self.interval)
+
+change_stream = ChangeStream()
+
+@app.route('/stream/<region>', methods=['GET'])
+def stream_changes(region):
+    """Server-Sent Events feed of instance and alarm changes for a region.
+
+    The first event is 'snapshot' with every instance and alarm in ALARM
+    state. After that, 'instances' and 'alarms' events carry only
+    {changed, removed}: changed records in full and removed IDs or alarm
+    names. 'error' reports a failed poll. Each open stream holds a worker
+    thread, so run threaded or async workers when serving it.
+    """
+    subscriber = change_stream.subscribe(region)
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=STREAM_HEARTBEAT)
+                except queue.Empty:
+                    # Keeps proxies from closing an idle stream and detects gone clients
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {event}\ndata: {dumps_json(data).decode('utf-8')}\n\n"
+        finally:
+            change_stream.unsubscribe(region, subscriber)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def _bucket_names(region):
+    s3 = get_client('s3', region)
+    # Optionally filter only buckets created in selected region
+    return [b['Name'] for b in s3.list_buckets()['Buckets']]
 
 @app.route('/s3-buckets/<region>', methods=['GET'])
 def list_s3_buckets(region):
-    s3 = boto3.client('s3', region_name=region)
     try:
-        buckets = s3.list_buckets()['Buckets']
-        # Optionally filter only buckets created in selected region
-        return jsonify([b['Name'] for b in buckets])
+        # list_buckets is account-wide, so every region shares one entry
+        encoded = poll_cache.get_or_load(('s3-buckets',), lambda: encode_json(_bucket_names(region)))
     except Exception as e:
         return jsonify([]), 500
+    return _encoded_json_response(*encoded)
     
+def _fetch_vpcs(region):
+    ec2 = get_ec2_client(region)
+    return [{'id': vpc['VpcId'], 'cidr': vpc['CidrBlock']} for vpc in _paginate(ec2, 'describe_vpcs', 'Vpcs')]
+
+@app.route('/ec2/vpcs/all', methods=['GET'])
+def get_vpcs_all_regions():
+    """VPCs from every enabled region, fetched concurrently"""
+    return _fan_out_regions(_fetch_vpcs, 'vpcs')
+
 @app.route('/ec2/vpcs/<region>', methods=['GET'])
 def get_vpcs(region):
-    ec2 = get_ec2_client(region)
     try:
-        vpcs = ec2.describe_vpcs()
-        return jsonify([
-            {'id': vpc['VpcId'], 'cidr': vpc['CidrBlock']}
-            for vpc in vpcs['Vpcs']
-        ])
+        return jsonify(_fetch_vpcs(region))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+CREATE_EC2_MAX_COUNT = int(os.getenv('CREATE_EC2_MAX_COUNT', '100'))
+CREATE_EC2_TIMEOUT = float(os.getenv('CREATE_EC2_TIMEOUT', '120'))
+EC2_TAG_VALUE_MAX_LENGTH = 256
+
+def _split_count(count, buckets):
+    """Spread count over buckets as evenly as possible, earlier buckets first"""
+    return [count // buckets + (1 if i < count % buckets else 0) for i in range(buckets)]
+
+def _launch_batch(ec2, launch_args, subnet_ids, count, name_template, start_index):
+    """One RunInstances call per subnet, run concurrently, then a Name tag per instance"""
+    launches = {}
+    offset = start_index
+    for subnet, share in zip(subnet_ids, _split_count(count, len(subnet_ids))):
+        if share:
+            launches[subnet] = (offset, share)
+            offset += share
+
+    outcomes = _run_parallel({
+        subnet: (lambda subnet=subnet, share=share: ec2.run_instances(
+            SubnetId=subnet, MinCount=share, MaxCount=share, **launch_args
+        )['Instances'])
+        for subnet, (_, share) in launches.items()
+    }, timeout=CREATE_EC2_TIMEOUT)
+
+    launched = []
+    report = {}
+    for subnet, (first_index, share) in launches.items():
+        outcome = outcomes[subnet]
+        report[subnet] = {k: v for k, v in outcome.items() if k != 'result'}
+        report[subnet]['requested'] = share
+        if outcome['status'] != 'ok':
+            continue
+        for inst in sorted(outcome['result'], key=lambda inst: inst['AmiLaunchIndex']):
+            launched.append({
+                'id': inst['InstanceId'],
+                'name': name_template.format(index=first_index + inst['AmiLaunchIndex']),
+                'subnet_id': subnet,
+                'az': inst['Placement']['AvailabilityZone'],
+                'private_ip': inst.get('PrivateIpAddress')
+            })
+
+    # Each instance gets its own Name, which RunInstances tag specifications can't express
+    tagged = _run_parallel({
+        inst['id']: (lambda inst=inst: ec2.create_tags(
+            Resources=[inst['id']], Tags=[{'Key': 'Name', 'Value': inst['name']}]
+        ))
+        for inst in launched
+    })
+    for inst in launched:
+        if tagged[inst['id']]['status'] != 'ok':
+            inst['tag_error'] = tagged[inst['id']]['error']
+    return launched, report
+
 @app.route('/create-ec2', methods=['POST'])
 def create_ec2():
+    """Launch one instance, or a batch.
+
+    Batch mode is used when count > 1 or subnet_ids is given:
+      count          - number of instances (up to CREATE_EC2_MAX_COUNT)
+      name_template  - per-instance Name, e.g. "web-{index:02d}"; defaults to "<name>-{index}"
+      start_index    - first index (default 1)
+      subnet_ids     - subnets to spread the instances over, evenly and in order;
+                       defaults to [subnet_id]
+
+    There is one RunInstances call per subnet, and the calls run concurrently.
+    """
     data = request.json
     region = data.get('region')
     ami = data.get('ami')
@@ -189,34 +1400,150 @@ def create_ec2():
     key_name = data.get('key_name')
     iam_instance_profile = data.get('iam_instance_profile')
     instance_name = data.get('name')
+    count = data.get('count', 1)
+    subnet_ids = data.get('subnet_ids')
+
+    launch_args = {'ImageId': ami, 'InstanceType': instance_type}
+    if security_group_id:
+        launch_args['SecurityGroupIds'] = [security_group_id]
+    if key_name:
+        launch_args['KeyName'] = key_name
+    if iam_instance_profile:
+        launch_args['IamInstanceProfile'] = {'Name': iam_instance_profile}
+
+    if not isinstance(count, int) or isinstance(count, bool) or not 1 <= count <= CREATE_EC2_MAX_COUNT:
+        return jsonify({'error': f'count must be between 1 and {CREATE_EC2_MAX_COUNT}'}), 400
+    if subnet_ids is not None and not (
+        isinstance(subnet_ids, list) and subnet_ids
+        and all(isinstance(s, str) and s for s in subnet_ids)
+        and len(set(subnet_ids)) == len(subnet_ids)
+    ):
+        return jsonify({'error': 'subnet_ids must be a non-empty list of distinct subnet IDs'}), 400
 
     ec2 = get_ec2_client(region)
+
+    if count == 1 and not subnet_ids:
+        try:
+            instances = ec2.run_instances(
+                SubnetId=subnet_id,
+                MinCount=1,
+                MaxCount=1,
+                TagSpecifications=[{
+                    'ResourceType': 'instance',
+                    'Tags': [{'Key': 'Name', 'Value': instance_name}]
+                }],
+                **launch_args
+            )
+            instance_inventory.invalidate(region)
+            instance = instances['Instances'][0]
+            return jsonify({
+                'status': 'success',
+                'instance_id': instance['InstanceId'],
+                'public_ip': instance.get('PublicIpAddress', 'N/A')
+            })
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    subnet_ids = subnet_ids or ([subnet_id] if subnet_id else [])
+    if not subnet_ids:
+        return jsonify({'error': 'subnet_id or subnet_ids is required for a batch launch'}), 400
+    name_template = data.get('name_template') or f"{instance_name or 'instance'}-{{index}}"
+    start_index = data.get('start_index', 1)
+    if not isinstance(start_index, int) or isinstance(start_index, bool) or start_index < 0:
+        return jsonify({'error': 'start_index must be a non-negative integer'}), 400
+    if not isinstance(name_template, str):
+        return jsonify({'error': 'name_template must be a string'}), 400
     try:
-        instances = ec2.run_instances(
-            ImageId=ami,
-            InstanceType=instance_type,
-            SubnetId=subnet_id,
-            SecurityGroupIds=[security_group_id],
-            KeyName=key_name,
-            IamInstanceProfile={'Name': iam_instance_profile} if iam_instance_profile else None,
-            MinCount=1,
-            MaxCount=1,
-            TagSpecifications=[{
-                'ResourceType': 'instance',
-                'Tags': [{'Key': 'Name', 'Value': instance_name}]
-            }]
-        )
-        instance = instances['Instances'][0]
-        return jsonify({
-            'status': 'success',
-            'instance_id': instance['InstanceId'],
-            'public_ip': instance.get('PublicIpAddress', 'N/A')
-        })
+        longest = max(len(name_template.format(index=i)) for i in range(start_index, start_index + count))
+    except (KeyError, IndexError, ValueError, AttributeError, TypeError) as e:
+        return jsonify({'error': f'Invalid name_template: {e}'}), 400
+    if longest > EC2_TAG_VALUE_MAX_LENGTH:
+        return jsonify({'error': f'Instance names must be at most {EC2_TAG_VALUE_MAX_LENGTH} characters'}), 400
+
+    started = time.perf_counter()
+    try:
+        launched, report = _launch_batch(ec2, launch_args, subnet_ids, count, name_template, start_index)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        instance_inventory.invalidate(region)
+
+    if not launched:
+        status = 'error'
+    else:
+        status = 'success' if len(launched) == count else 'partial'
+    return jsonify({
+        'status': status,
+        'requested': count,
+        'launched': len(launched),
+        'instance_ids': [inst['id'] for inst in launched],
+        'instances': launched,
+        'launches': report,
+        'elapsed_ms': _elapsed_ms(started)
+    }), 200 if launched else 500
+
+def _name_tags(resource_type, name):
+    return [{'ResourceType': resource_type, 'Tags': [{'Key': 'Name', 'Value': name}]}]
+
+VPC_MAX_SUBNETS = int(os.getenv('VPC_MAX_SUBNETS', '200'))  # AWS default subnets-per-VPC quota
+
+def _plan_subnets(cidr_block, subnet_cidrs, subnet_count, subnet_prefix):
+    """Validated subnet CIDRs: the given list, or subnet_count blocks carved from the VPC CIDR"""
+    vpc_network = ipaddress.ip_network(cidr_block)
+    if not 16 <= vpc_network.prefixlen <= 28:
+        raise ValueError('cidr_block must be between /16 and /28')
+    if subnet_cidrs:
+        if not isinstance(subnet_cidrs, list):
+            raise ValueError('subnet_cidrs must be a list')
+        if len(subnet_cidrs) > VPC_MAX_SUBNETS:
+            raise ValueError(f'At most {VPC_MAX_SUBNETS} subnets per VPC')
+        networks = [ipaddress.ip_network(cidr) for cidr in subnet_cidrs]
+        for network in networks:
+            if network.version != vpc_network.version or not network.subnet_of(vpc_network):
+                raise ValueError(f'{network} is outside the VPC CIDR {cidr_block}')
+            if network.prefixlen > 28:
+                raise ValueError(f'{network} is smaller than /28, the smallest subnet AWS allows')
+        # Once sorted, any overlap shows up between neighbours
+        ordered = sorted(networks)
+        for previous, network in zip(ordered, ordered[1:]):
+            if network.overlaps(previous):
+                raise ValueError(f'{network} overlaps {previous}')
+        return [str(network) for network in networks]
+    elif subnet_count is not None:
+        if not isinstance(subnet_count, int) or isinstance(subnet_count, bool) or subnet_count < 1:
+            raise ValueError('subnet_count must be a positive integer')
+        if subnet_count > VPC_MAX_SUBNETS:
+            raise ValueError(f'At most {VPC_MAX_SUBNETS} subnets per VPC')
+        if subnet_prefix is not None and (not isinstance(subnet_prefix, int) or isinstance(subnet_prefix, bool)):
+            raise ValueError('subnet_prefix must be an integer')
+        if subnet_prefix is None:
+            # Smallest split that fits subnet_count subnets
+            subnet_prefix = vpc_network.prefixlen + (subnet_count - 1).bit_length()
+        if not vpc_network.prefixlen <= subnet_prefix <= 28:
+            raise ValueError(f'subnet_prefix must be between /{vpc_network.prefixlen} and /28')
+        networks = []
+        for network in vpc_network.subnets(new_prefix=subnet_prefix):
+            if len(networks) == subnet_count:
+                break
+            networks.append(network)
+        if len(networks) < subnet_count:
+            raise ValueError(f'{cidr_block} only fits {len(networks)} /{subnet_prefix} subnets')
+        # Blocks carved from the VPC CIDR are disjoint and inside it by construction
+        return [str(network) for network in networks]
+    return []
 
 @app.route('/create-vpc', methods=['POST'])
 def create_vpc():
+    """Create a VPC and optionally its subnets.
+
+    Subnets come from subnet_cidrs (a list), subnet_count (carved from
+    cidr_block, using /subnet_prefix blocks if given) or the single
+    subnet_cidr. They are spread round-robin over availability_zones,
+    which defaults to every available AZ in the region. Name tags are
+    applied at creation time. The VPC and the AZ lookup run concurrently,
+    then all subnets are created concurrently. If any subnet fails the
+    response is a 500 that still carries vpc_id, subnets and errors.
+    """
     data = request.json
     name = data.get('name')
     cidr_block = data.get('cidr_block')
@@ -226,86 +1553,243 @@ def create_vpc():
     if not name or not cidr_block:
         return jsonify({'error': 'VPC name and CIDR block are required'}), 400
 
-    ec2 = get_ec2_client(region)
+    requested_zones = data.get('availability_zones')
+    if requested_zones is not None and (
+            not isinstance(requested_zones, list) or not all(isinstance(zone, str) for zone in requested_zones)):
+        return jsonify({'error': 'availability_zones must be a list of zone names'}), 400
 
     try:
-        # Create the VPC
-        vpc_response = ec2.create_vpc(CidrBlock=cidr_block)
-        vpc_id = vpc_response['Vpc']['VpcId']
-
-        # Tag the VPC with a Name
-        ec2.create_tags(Resources=[vpc_id], Tags=[{'Key': 'Name', 'Value': name}])
-
-        subnet_id = None
-        if subnet_cidr:
-            # Get availability zones to pick one for the subnet
-            zones = ec2.describe_availability_zones()['AvailabilityZones']
-            if not zones:
-                raise Exception("No availability zones found for region.")
-            az = zones[0]['ZoneName']
-
-            subnet_response = ec2.create_subnet(
-                VpcId=vpc_id,
-                CidrBlock=subnet_cidr,
-                AvailabilityZone=az
-            )
-            subnet_id = subnet_response['Subnet']['SubnetId']
+        subnet_cidrs = _plan_subnets(
+            cidr_block,
+            data.get('subnet_cidrs') or ([subnet_cidr] if subnet_cidr else None),
+            data.get('subnet_count'),
+            data.get('subnet_prefix')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid subnet layout: {e}'}), 400
 
-            # Tag the subnet
-            ec2.create_tags(Resources=[subnet_id], Tags=[{'Key': 'Name', 'Value': f"{name}-subnet"}])
+    ec2 = get_ec2_client(region)
+    started = time.perf_counter()
+    timings = {}
+
+    tasks = {'create_vpc': lambda: ec2.create_vpc(
+        CidrBlock=cidr_block, TagSpecifications=_name_tags('vpc', name)
+    )['Vpc']['VpcId']}
+    if subnet_cidrs and not requested_zones:
+        tasks['availability_zones'] = lambda: [
+            zone['ZoneName'] for zone in ec2.describe_availability_zones(
+                Filters=[{'Name': 'state', 'Values': ['available']}]
+            )['AvailabilityZones']
+        ]
+    outcomes = _run_parallel(tasks)
+    for step, outcome in outcomes.items():
+        timings[step] = outcome.get('elapsed_ms')
+
+    if outcomes['create_vpc']['status'] != 'ok':
+        return jsonify({'error': outcomes['create_vpc']['error'], 'timings': timings}), 500
+    vpc_id = outcomes['create_vpc']['result']
+    _invalidate_launch_options(region)
+
+    subnets = []
+    errors = []
+    if subnet_cidrs:
+        zones = requested_zones or outcomes['availability_zones'].get('result')
+        if not zones:
+            errors.append(f"No availability zones found for region: {outcomes['availability_zones'].get('error')}")
+        else:
+            # Keep the old subnet name when a single subnet_cidr was given
+            single = len(subnet_cidrs) == 1 and not data.get('subnet_cidrs')
+            plan = [
+                (cidr, zones[i % len(zones)], f"{name}-subnet" if single else f"{name}-subnet-{i + 1}")
+                for i, cidr in enumerate(subnet_cidrs)
+            ]
+            subnets_started = time.perf_counter()
+            subnet_outcomes = _run_parallel({
+                cidr: (lambda cidr=cidr, az=az, subnet_name=subnet_name: ec2.create_subnet(
+                    VpcId=vpc_id, CidrBlock=cidr, AvailabilityZone=az,
+                    TagSpecifications=_name_tags('subnet', subnet_name)
+                )['Subnet']['SubnetId'])
+                for cidr, az, subnet_name in plan
+            })
+            for cidr, az, subnet_name in plan:
+                outcome = subnet_outcomes[cidr]
+                subnet = {'cidr': cidr, 'az': az, 'name': subnet_name, 'elapsed_ms': outcome.get('elapsed_ms')}
+                if outcome['status'] == 'ok':
+                    subnet['id'] = outcome['result']
+                else:
+                    subnet['error'] = outcome['error']
+                    errors.append(f"{cidr}: {outcome['error']}")
+                subnets.append(subnet)
+            timings['create_subnets'] = _elapsed_ms(subnets_started)
+    timings['total'] = _elapsed_ms(started)
+
+    created = [subnet['id'] for subnet in subnets if 'id' in subnet]
+    body = {
+        'status': 'partial' if errors else 'success',
+        'vpc_id': vpc_id,
+        'subnet_id': created[0] if created else None,
+        'subnets': subnets,
+        'errors': errors,
+        'timings': timings
+    }
+    if errors:
+        # The VPC exists, but the caller asked for subnets it did not get
+        body['error'] = f'VPC {vpc_id} was created, but {len(subnet_cidrs) - len(created)} of {len(subnet_cidrs)} subnets failed'
+        return jsonify(body), 500
+    return jsonify(body)
 
-        return jsonify({
-            'status': 'success',
-            'vpc_id': vpc_id,
-            'subnet_id': subnet_id
-        })
+def _vpc_filter(vpc_id):
+    return {'Filters': [{'Name': 'vpc-id', 'Values': [vpc_id]}]} if vpc_id else {}
 
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+def _fetch_subnets(region, vpc_id=None):
+    ec2 = get_ec2_client(region)
+    return [
+        {'id': subnet['SubnetId'], 'az': subnet['AvailabilityZone'], 'cidr': subnet['CidrBlock'], 'vpc_id': subnet['VpcId']}
+        for subnet in _paginate(ec2, 'describe_subnets', 'Subnets', **_vpc_filter(vpc_id))
+    ]
+
+def _fetch_security_groups(region, vpc_id=None):
+    ec2 = get_ec2_client(region)
+    return [
+        {'id': sg['GroupId'], 'name': sg['GroupName'], 'vpc_id': sg.get('VpcId')}
+        for sg in _paginate(ec2, 'describe_security_groups', 'SecurityGroups', **_vpc_filter(vpc_id))
+    ]
 
+def _fetch_key_pairs(region):
+    # describe_key_pairs is not paginated; it always returns every key pair
+    return [{'name': kp['KeyName']} for kp in get_ec2_client(region).describe_key_pairs()['KeyPairs']]
+
+def _fetch_instance_profiles():
+    iam = get_client('iam')
+    return [{'name': p['InstanceProfileName']} for p in _paginate(iam, 'list_instance_profiles', 'InstanceProfiles')]
 
 @app.route('/ec2/subnets/<region>/<vpc_id>', methods=['GET'])
 def get_subnets(region, vpc_id):
-    ec2 = get_ec2_client(region)
     try:
-        subnets = ec2.describe_subnets(Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]}])
-        return jsonify([
-            {'id': subnet['SubnetId'], 'az': subnet['AvailabilityZone'], 'cidr': subnet['CidrBlock']}
-            for subnet in subnets['Subnets']
-        ])
+        return jsonify(_fetch_subnets(region, vpc_id))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/ec2/security-groups/<region>/<vpc_id>', methods=['GET'])
 def get_security_groups(region, vpc_id):
-    ec2 = get_ec2_client(region)
     try:
-        security_groups = ec2.describe_security_groups(Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]}])
-        return jsonify([
-            {'id': sg['GroupId'], 'name': sg['GroupName']}
-            for sg in security_groups['SecurityGroups']
-        ])
+        return jsonify(_fetch_security_groups(region, vpc_id))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/ec2/key-pairs/<region>', methods=['GET'])
 def get_key_pairs(region):
-    ec2 = get_ec2_client(region)
     try:
-        keys = ec2.describe_key_pairs()
-        return jsonify([{'name': kp['KeyName']} for kp in keys['KeyPairs']])
+        return jsonify(_fetch_key_pairs(region))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/ec2/iam-profiles/<region>', methods=['GET'])
 def get_iam_instance_profiles(region):
-    iam = boto3.client('iam')
     try:
-        profiles = iam.list_instance_profiles()
-        return jsonify([{'name': p['InstanceProfileName']} for p in profiles['InstanceProfiles']])
+        return jsonify(launch_options_cache.get_or_load(('iam_profiles',), _fetch_instance_profiles))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+LAUNCH_OPTIONS_TTL = float(os.getenv('LAUNCH_OPTIONS_TTL', '300'))
+launch_options_cache = TTLCache(LAUNCH_OPTIONS_TTL)
+
+# Lookup name -> (cache key, loader); instance profiles are global, so one entry serves every region
+LAUNCH_OPTION_LOOKUPS = {
+    'vpcs': lambda region: (('vpcs', region), lambda: _fetch_vpcs(region)),
+    'subnets': lambda region: (('subnets', region), lambda: _fetch_subnets(region)),
+    'security_groups': lambda region: (('security_groups', region), lambda: _fetch_security_groups(region)),
+    'key_pairs': lambda region: (('key_pairs', region), lambda: _fetch_key_pairs(region)),
+    'iam_profiles': lambda region: (('iam_profiles',), _fetch_instance_profiles),
+}
+
+def _invalidate_launch_options(region):
+    for name, lookup in LAUNCH_OPTION_LOOKUPS.items():
+        if name != 'iam_profiles':
+            launch_options_cache.invalidate(lookup(region)[0])
+
+@app.route('/ec2/launch-options/<region>', methods=['GET'])
+def get_launch_options(region):
+    """Everything the create-EC2 form needs, in one response.
+
+    Returns vpcs, subnets, security_groups (both tagged with vpc_id for
+    filtering in the browser), key_pairs and iam_profiles, plus a per-lookup
+    report. Lookups run concurrently and are cached for LAUNCH_OPTIONS_TTL
+    seconds; ?refresh=true reloads the regional ones. A failed lookup comes
+    back empty with its error in the report.
+    """
+    if request.args.get('refresh') == 'true':
+        _invalidate_launch_options(region)
+    started = time.perf_counter()
+    tasks = {}
+    for name, lookup in LAUNCH_OPTION_LOOKUPS.items():
+        key, loader = lookup(region)
+        tasks[name] = lambda key=key, loader=loader: launch_options_cache.get_or_load(key, loader)
+    outcomes = _run_parallel(tasks)
+
+    body = {'region': region, 'lookups': {}}
+    for name, outcome in outcomes.items():
+        body[name] = outcome.get('result', [])
+        body['lookups'][name] = {k: v for k, v in outcome.items() if k != 'result'}
+    body['elapsed_ms'] = _elapsed_ms(started)
+    return json_response(body)
+
+def _provision_bucket(bucket_name, region, block_public_access=True, versioning=False, tags=None):
+    """Create a bucket, then apply its configuration calls one after another.
+
+    S3 rejects concurrent subresource updates on one bucket with 409
+    OperationAborted, so only separate buckets are provisioned in parallel.
+    Raises if the bucket can't be created; otherwise returns
+    {step: {'status': 'ok'|'error', 'error', 'elapsed_ms'}}, and a failed
+    step does not stop the ones after it.
+    """
+    s3 = get_client('s3', region)
+    # Handle us-east-1 differently
+    if region == 'us-east-1':
+        s3.create_bucket(Bucket=bucket_name)
+    else:
+        s3.create_bucket(
+            Bucket=bucket_name,
+            CreateBucketConfiguration={'LocationConstraint': region}
+        )
+
+    steps = {}
+    if block_public_access:
+        steps['public_access_block'] = lambda: s3.put_public_access_block(
+            Bucket=bucket_name,
+            PublicAccessBlockConfiguration={
+                'BlockPublicAcls': True,
+                'IgnorePublicAcls': True,
+                'BlockPublicPolicy': True,
+                'RestrictPublicBuckets': True
+            }
+        )
+    if versioning:
+        steps['versioning'] = lambda: s3.put_bucket_versioning(
+            Bucket=bucket_name,
+            VersioningConfiguration={'Status': 'Enabled'}
+        )
+    if tags:
+        steps['tagging'] = lambda: s3.put_bucket_tagging(
+            Bucket=bucket_name,
+            Tagging={'TagSet': tags}
+        )
+
+    outcomes = {}
+    for step, call in steps.items():
+        started = time.perf_counter()
+        try:
+            call()
+            outcomes[step] = {'status': 'ok'}
+        except Exception as e:
+            logger.warning(f"Configuring bucket {bucket_name} failed at {step}: {e}")
+            outcomes[step] = {'status': 'error', 'error': str(e)}
+        outcomes[step]['elapsed_ms'] = _elapsed_ms(started)
+    return outcomes
+
+def _failed_steps(steps):
+    return [f"{step}: {outcome['error']}" for step, outcome in steps.items() if outcome['status'] != 'ok']
+
 @app.route('/create-s3', methods=['POST'])
 def create_s3_bucket():
     data = request.json
@@ -321,58 +1805,118 @@ def create_s3_bucket():
     if not is_valid_bucket_name(bucket_name):
         return jsonify({'status': 'error', 'message': 'Invalid bucket name'}), 400
 
-    s3 = boto3.client('s3', region_name=region)
-
     try:
-        # Handle us-east-1 differently
-        if region == 'us-east-1':
-            s3.create_bucket(Bucket=bucket_name)
-        else:
-            s3.create_bucket(
-                Bucket=bucket_name,
-                CreateBucketConfiguration={'LocationConstraint': region}
-            )
-
-        if block_public_access:
-            s3.put_public_access_block(
-                Bucket=bucket_name,
-                PublicAccessBlockConfiguration={
-                    'BlockPublicAcls': True,
-                    'IgnorePublicAcls': True,
-                    'BlockPublicPolicy': True,
-                    'RestrictPublicBuckets': True
-                }
-            )
-
-        if versioning:
-            s3.put_bucket_versioning(
-                Bucket=bucket_name,
-                VersioningConfiguration={'Status': 'Enabled'}
-            )
-
-        if tags:
-            s3.put_bucket_tagging(
-                Bucket=bucket_name,
-                Tagging={'TagSet': tags}
-            )
-
-        return jsonify({'status': 'success', 'message': f'S3 bucket {bucket_name} created successfully'})
-    
+        steps = _provision_bucket(bucket_name, region, block_public_access, versioning, tags)
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
+    finally:
+        poll_cache.invalidate(('s3-buckets',))
+
+    failed = _failed_steps(steps)
+    if failed:
+        return jsonify({'status': 'error', 'message': f"Bucket {bucket_name} created, but " + '; '.join(failed)}), 500
+    return jsonify({'status': 'success', 'message': f'S3 bucket {bucket_name} created successfully'})
+
+S3_BULK_MAX_BUCKETS = int(os.getenv('S3_BULK_MAX_BUCKETS', '100'))
+S3_BULK_MAX_WORKERS = int(os.getenv('S3_BULK_MAX_WORKERS', '8'))
+S3_BULK_TIMEOUT = float(os.getenv('S3_BULK_TIMEOUT', '120'))
+
+@app.route('/create-s3/bulk', methods=['POST'])
+def create_s3_buckets_bulk():
+    """Create many buckets in one request.
+
+    Body: {"region": default region, "buckets": [{"bucket_name", "region",
+    "block_public_access", "versioning", "tags"}, ...]}, with the same
+    per-bucket fields and defaults as /create-s3. Every spec is validated
+    before anything is created, and any invalid spec fails the whole request
+    with 400. Buckets are then provisioned concurrently, up to
+    S3_BULK_MAX_WORKERS at a time, and the response has a result per bucket.
+    """
+    data = request.json
+    default_region = data.get('region')
+    specs = data.get('buckets')
+
+    if not isinstance(specs, list) or not specs:
+        return jsonify({'status': 'error', 'message': 'buckets must be a non-empty list'}), 400
+    if len(specs) > S3_BULK_MAX_BUCKETS:
+        return jsonify({'status': 'error', 'message': f'At most {S3_BULK_MAX_BUCKETS} buckets per request'}), 400
+
+    invalid = []
+    seen = set()
+    for spec in specs:
+        bucket_name = spec.get('bucket_name') if isinstance(spec, dict) else None
+        region = spec.get('region', default_region) if isinstance(spec, dict) else None
+        if not bucket_name or not region:
+            message = 'bucket_name and region are required'
+        elif not isinstance(bucket_name, str) or not isinstance(region, str):
+            message = 'bucket_name and region must be strings'
+        elif not _is_known_region(region):
+            message = f'Unknown region: {region}'
+        elif not is_valid_bucket_name(bucket_name):
+            message = 'Invalid bucket name'
+        elif bucket_name in seen:
+            message = 'Duplicate bucket name'
+        else:
+            seen.add(bucket_name)
+            continue
+        invalid.append({'bucket_name': bucket_name, 'message': message})
+    if invalid:
+        return jsonify({'status': 'error', 'message': 'No buckets were created', 'invalid': invalid}), 400
+
+    started = time.perf_counter()
+    try:
+        outcomes = _run_parallel({
+            spec['bucket_name']: (lambda spec=spec: _provision_bucket(
+                spec['bucket_name'],
+                spec.get('region', default_region),
+                spec.get('block_public_access', True),
+                spec.get('versioning', False),
+                spec.get('tags', [])
+            ))
+            for spec in specs
+        }, max_workers=S3_BULK_MAX_WORKERS, timeout=S3_BULK_TIMEOUT)
+    finally:
+        poll_cache.invalidate(('s3-buckets',))
+
+    results = []
+    for spec in specs:
+        bucket_name = spec['bucket_name']
+        outcome = outcomes[bucket_name]
+        result = {
+            'bucket_name': bucket_name,
+            'region': spec.get('region', default_region),
+            'elapsed_ms': outcome.get('elapsed_ms')
+        }
+        if outcome['status'] != 'ok':
+            result.update(status='error', message=outcome['error'])
+        else:
+            failed = _failed_steps(outcome['result'])
+            result['steps'] = {
+                step: {k: v for k, v in step_outcome.items() if k != 'result'}
+                for step, step_outcome in outcome['result'].items()
+            }
+            if failed:
+                result.update(status='error', message='Created, but ' + '; '.join(failed))
+            else:
+                result.update(status='success', message=f'S3 bucket {bucket_name} created successfully')
+        results.append(result)
 
+    succeeded = sum(1 for r in results if r['status'] == 'success')
+    return jsonify({
+        'results': results,
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'elapsed_ms': _elapsed_ms(started)
+    })
 
 @app.route('/instance/<region>/<instance_id>', methods=['GET'])
 def get_instance_details(region, instance_id):
     """Get detailed information about a specific instance"""
     try:
-        ec2 = get_ec2_client(region)
-        response = ec2.describe_instances(InstanceIds=[instance_id])
-        
-        if not response['Reservations']:
+        inst = instance_inventory.get_instance(region, instance_id)
+        if inst is None:
             return jsonify({'error': 'Instance not found'}), 404
             
-        inst = response['Reservations'][0]['Instances'][0]
         name = next((tag['Value'] for tag in inst.get('Tags', []) if tag['Key'] == 'Name'), None)
         
         # Get IP addresses
@@ -400,7 +1944,7 @@ def get_instance_details(region, instance_id):
             'monitoring': inst.get('Monitoring', {}).get('State', 'disabled')
         }
         
-        return jsonify(instance_details)
+        return json_response(project(instance_details, requested_fields()))
         
     except Exception as e:
         error_str = str(e)
@@ -409,6 +1953,8 @@ def get_instance_details(region, instance_id):
         if 'InvalidInstanceID.NotFound' in error_str:
             return jsonify({'error': 'Instance not found'}), 404
         elif 'RequestExpired' in error_str:
+            # Static credentials were rotated; rebuild clients on the next call
+            reset_aws_clients()
             return jsonify({
                 'error': 'AWS session has expired',
                 'message': 'Please refresh your AWS credentials and try again'
@@ -420,13 +1966,10 @@ def get_instance_details(region, instance_id):
 def get_instance_private_ip(region, instance_id):
     """Get the private IP address of a specific instance for installation purposes"""
     try:
-        ec2 = get_ec2_client(region)
-        response = ec2.describe_instances(InstanceIds=[instance_id])
-        
-        if not response['Reservations']:
+        inst = instance_inventory.get_instance(region, instance_id)
+        if inst is None:
             return jsonify({'error': 'Instance not found'}), 404
             
-        inst = response['Reservations'][0]['Instances'][0]
         private_ip = inst.get('PrivateIpAddress', None)
         public_ip = inst.get('PublicIpAddress', None)
         state = inst['State']['Name']
@@ -459,13 +2002,10 @@ def get_instance_private_ip(region, instance_id):
 def get_installation_info(region, instance_id):
     """Get comprehensive installation information for an instance"""
     try:
-        ec2 = get_ec2_client(region)
-        response = ec2.describe_instances(InstanceIds=[instance_id])
-        
-        if not response['Reservations']:
+        inst = instance_inventory.get_instance(region, instance_id)
+        if inst is None:
             return jsonify({'error': 'Instance not found'}), 404
             
-        inst = response['Reservations'][0]['Instances'][0]
         name = next((tag['Value'] for tag in inst.get('Tags', []) if tag['Key'] == 'Name'), None)
         private_ip = inst.get('PrivateIpAddress', None)
         public_ip = inst.get('PublicIpAddress', None)
@@ -518,17 +2058,10 @@ def get_installation_info(region, instance_id):
 def get_installation_ready_instances(region):
     """Get all instances that are ready for software installation"""
     try:
-        ec2 = get_ec2_client(region)
-        instances = ec2.describe_instances(
-            Filters=[
-                {'Name': 'instance-state-name', 'Values': ['running']}
-            ]
-        )
-        
         ready_instances = []
         
-        for res in instances['Reservations']:
-            for inst in res['Instances']:
+        for inst in instance_inventory.instances(region):
+            if inst['State']['Name'] == 'running':
                 private_ip = inst.get('PrivateIpAddress', None)
                 public_ip = inst.get('PublicIpAddress', None)
                 key_name = inst.get('KeyName', None)
@@ -546,8 +2079,9 @@ def get_installation_ready_instances(region):
                         'az': inst['Placement']['AvailabilityZone']
                     })
         
-        return jsonify({
-            'ready_instances': ready_instances,
+        fields = requested_fields()
+        return json_response({
+            'ready_instances': [project(item, fields) for item in ready_instances],
             'count': len(ready_instances),
             'region': region
         })
@@ -557,16 +2091,67 @@ def get_installation_ready_instances(region):
         logger.error(f"Error fetching installation-ready instances: {error_str}")
         return jsonify({'error': error_str}), 500
 
+REGION_REFRESH_INTERVAL = float(os.getenv('REGION_REFRESH_INTERVAL', '86400'))
+
+class RegionList:
+    """Regions enabled for the account, loaded once per worker and kept in memory.
+
+    A background thread reloads the list every REGION_REFRESH_INTERVAL
+    seconds and keeps serving the previous list if a reload fails. The AWS
+    health probe reloads it too, since it makes the same call anyway.
+    """
+
+    def __init__(self, interval=REGION_REFRESH_INTERVAL):
+        self.interval = interval
+        self._regions = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self):
+        regions = get_ec2_client('us-east-1').describe_regions()
+        self._regions = sorted(region['RegionName'] for region in regions['Regions'])
+        return self._regions
+
+    def warm(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Region list warmup failed, loading on first use: {e}")
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Region list refresh failed, keeping the previous list: {e}")
+
+    def loaded(self):
+        """The last loaded list, without loading it"""
+        return self._regions or ()
+
+    def get(self):
+        with self._lock:
+            if self._regions is None:
+                self.refresh()
+            self._thread = _ensure_thread(self._thread, self._loop, 'region-refresh')
+        return list(self._regions)
+
+enabled_regions = RegionList()
+enabled_regions.warm()
+
+def _enabled_regions():
+    """Names of the regions enabled for this account, sorted"""
+    return enabled_regions.get()
+
 @app.route('/regions', methods=['GET'])
 def list_regions():
-    """List all available AWS regions"""
+    """List all available AWS regions; ?refresh=true reloads them from AWS"""
     try:
-        ec2 = boto3.client('ec2', region_name='us-east-1')
-        regions = ec2.describe_regions()
-        
-        region_list = [region['RegionName'] for region in regions['Regions']]
-        region_list.sort()
-        
+        if request.args.get('refresh') == 'true':
+            enabled_regions.refresh()
+        region_list = _enabled_regions()
+
         return jsonify({
             'regions': region_list,
             'count': len(region_list)
@@ -599,15 +2184,229 @@ def get_instance_metrics(region, instance_id):
     metrics['CPUUtilization'] = fetch('CPUUtilization')
     return jsonify(metrics)
 
+METRIC_DATA_MAX_QUERIES = 500  # GetMetricData limit per call
+METRIC_BATCH_MAX_MINUTES = 14 * 24 * 60  # longest window /metrics/batch serves
+METRIC_BATCH_MAX_SERIES = int(os.getenv('METRIC_BATCH_MAX_SERIES', '2000'))  # instances x metrics per request
+
+def _get_metric_data(cw, queries, start, end):
+    """Run MetricDataQueries in chunks of 500; returns {query_id: {epoch: value}}"""
+    chunks = [queries[i:i + METRIC_DATA_MAX_QUERIES] for i in range(0, len(queries), METRIC_DATA_MAX_QUERIES)]
+
+    def fetch(chunk):
+        series = {}
+        pages = cw.get_paginator('get_metric_data').paginate(
+            MetricDataQueries=chunk,
+            StartTime=start,
+            EndTime=end,
+            ScanBy='TimestampAscending'
+        )
+        for page in pages:
+            for result in page['MetricDataResults']:
+                points = series.setdefault(result['Id'], {})
+                for ts, value in zip(result['Timestamps'], result['Values']):
+                    points[int(ts.timestamp())] = value
+        return series
+
+    outcomes = _run_parallel({i: (lambda chunk=chunk: fetch(chunk)) for i, chunk in enumerate(chunks)})
+    series = {}
+    for outcome in outcomes.values():
+        if outcome['status'] != 'ok':
+            raise Exception(outcome['error'])
+        series.update(outcome['result'])
+    return series
+
+@app.route('/metrics/batch', methods=['POST'])
+def get_batch_metrics():
+    """Fetch metrics for many instances in as few GetMetricData calls as possible.
+
+    Body: {"region": "...", "instance_ids": [...], "metrics": ["CPUUtilization"],
+           "period": 300, "minutes": 60, "stat": "Average"}
+    Returns one shared timestamp axis and, per instance and metric, a value
+    list aligned to it (null where CloudWatch has no datapoint).
+    """
+    data = request.json or {}
+    region = data.get('region')
+    instance_ids = data.get('instance_ids') or []
+    metric_names = data.get('metrics') or ['CPUUtilization']
+    stat = data.get('stat', 'Average')
+
+    if not region or not instance_ids:
+        return jsonify({'error': 'region and instance_ids are required'}), 400
+    if not isinstance(region, str) or not isinstance(stat, str):
+        return jsonify({'error': 'region and stat must be strings'}), 400
+    for name, values in (('instance_ids', instance_ids), ('metrics', metric_names)):
+        if not isinstance(values, list) or not all(isinstance(v, str) and v for v in values):
+            return jsonify({'error': f'{name} must be a list of non-empty strings'}), 400
+    if len(instance_ids) * len(metric_names) > METRIC_BATCH_MAX_SERIES:
+        return jsonify({'error': f'At most {METRIC_BATCH_MAX_SERIES} instance/metric pairs per request'}), 400
+    try:
+        period = int(data.get('period', 300))
+        minutes = int(data.get('minutes', 60))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'period and minutes must be integers'}), 400
+    if period <= 0 or period % 60:
+        return jsonify({'error': 'period must be a positive multiple of 60'}), 400
+    if not period // 60 <= minutes <= METRIC_BATCH_MAX_MINUTES:
+        return jsonify({'error': f'minutes must be between {period // 60} and {METRIC_BATCH_MAX_MINUTES}'}), 400
+
+    # Align the window to the period so every series shares one time axis
+    end_epoch = int(time.time()) // period * period
+    start_epoch = end_epoch - minutes * 60
+    grid = list(range(start_epoch, end_epoch, period))
+
+    queries = []
+    targets = {}
+    for instance_id in instance_ids:
+        for metric_name in metric_names:
+            query_id = f'm{len(queries)}'
+            targets[query_id] = (instance_id, metric_name)
+            queries.append({
+                'Id': query_id,
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': 'AWS/EC2',
+                        'MetricName': metric_name,
+                        'Dimensions': [{'Name': 'InstanceId', 'Value': instance_id}]
+                    },
+                    'Period': period,
+                    'Stat': stat
+                },
+                'ReturnData': True
+            })
+
+    try:
+        series = _get_metric_data(
+            get_cloudwatch_client(region),
+            queries,
+            datetime.datetime.utcfromtimestamp(start_epoch),
+            datetime.datetime.utcfromtimestamp(end_epoch)
+        )
+    except Exception as e:
+        logger.error(f"Error fetching batch metrics for {region}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    results = {instance_id: {} for instance_id in instance_ids}
+    for query_id, (instance_id, metric_name) in targets.items():
+        points = series.get(query_id, {})
+        results[instance_id][metric_name] = [points.get(ts) for ts in grid]
+
+    return jsonify({
+        'region': region,
+        'period': period,
+        'stat': stat,
+        'timestamps': [datetime.datetime.utcfromtimestamp(ts).isoformat() + 'Z' for ts in grid],
+        'metrics': results
+    })
+
 with open("./db/data.json", "r") as f:
     DATA = json.load(f)
 
+CATALOGUE_MAX_PAGE_SIZE = 500
+
+def _tokens(text):
+    return re.findall(r'[a-z0-9]+', str(text or '').lower())
+
+class Catalogue:
+    """Automation catalogue indexed by category, request type and search tokens.
+
+    Encoded bodies (plain and gzip) are built once per distinct query and
+    reused, so repeat requests cost a dictionary lookup.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.by_category = {}
+        self.by_request_type = {}
+        self.token_index = {}
+        for i, entry in enumerate(entries):
+            self.by_category.setdefault(str(entry.get('Category', '')).lower(), []).append(i)
+            self.by_request_type.setdefault(str(entry.get('Request Type', '')).lower(), []).append(i)
+            for field in ('Comment', 'Category', 'Request Type'):
+                for token in _tokens(entry.get(field)):
+                    self.token_index.setdefault(token, set()).add(i)
+        self.vocabulary = sorted(self.token_index)
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def _matching_token(self, prefix):
+        """Entries containing a token that starts with prefix (search-as-you-type)"""
+        matches = set()
+        for j in range(bisect.bisect_left(self.vocabulary, prefix), len(self.vocabulary)):
+            if not self.vocabulary[j].startswith(prefix):
+                break
+            matches |= self.token_index[self.vocabulary[j]]
+        return matches
+
+    def search(self, category=None, request_type=None, q=None):
+        indices = set(range(len(self.entries)))
+        if category:
+            indices &= set(self.by_category.get(category.lower(), []))
+        if request_type:
+            indices &= set(self.by_request_type.get(request_type.lower(), []))
+        for token in _tokens(q):
+            indices &= self._matching_token(token)
+        return sorted(indices)
+
+    def facets(self):
+        return {
+            'categories': {self.entries[ids[0]].get('Category'): len(ids) for ids in self.by_category.values()},
+            'request_types': {self.entries[ids[0]].get('Request Type'): len(ids) for ids in self.by_request_type.values()}
+        }
+
+    def encoded(self, key, build):
+        """(body, gzipped body, etag) for a query key, built on first use"""
+        cached = self._encoded.get(key)
+        if cached is None:
+            cached = encode_json(build())
+            with self._lock:
+                if len(self._encoded) > 1024:
+                    self._encoded.clear()
+                self._encoded[key] = cached
+        return cached
+
+catalogue = Catalogue(DATA)
+catalogue.encoded(('all',), lambda: DATA)  # precompress the full catalogue at load time
+
 # AWS S3 setup (use IAM role or env vars in production)
-s3_client = boto3.client('s3')
+s3_client = get_client('s3')
 
 @app.route("/api/data", methods=["GET"])
 def get_data():
-    return jsonify(DATA)
+    """Automation catalogue.
+
+    Query params: category, request_type, q (search over category, request
+    type and comment), page and page_size. Without page/page_size the
+    matching entries are returned as a plain list.
+    """
+    category = request.args.get('category')
+    request_type = request.args.get('request_type')
+    q = request.args.get('q')
+    page = request.args.get('page', type=int)
+    page_size = request.args.get('page_size', type=int)
+
+    if not any((category, request_type, q, page, page_size)):
+        return _encoded_json_response(*catalogue.encoded(('all',), lambda: DATA))
+
+    def build():
+        matches = [catalogue.entries[i] for i in catalogue.search(category, request_type, q)]
+        if page is None and page_size is None:
+            return matches
+        size = max(1, min(page_size or 10, CATALOGUE_MAX_PAGE_SIZE))
+        number = max(1, page or 1)
+        return {
+            'items': matches[(number - 1) * size:number * size],
+            'total': len(matches),
+            'page': number,
+            'page_size': size
+        }
+
+    key = (category, request_type, q, page, page_size)
+    return _encoded_json_response(*catalogue.encoded(key, build))
+
+@app.route("/api/data/facets", methods=["GET"])
+def get_data_facets():
+    """Category and request type counts, for building filters without the full catalogue"""
+    return _encoded_json_response(*catalogue.encoded(('facets',), catalogue.facets))
 
 @app.route('/create-ecs', methods=['POST'])
 def create_ecs():
@@ -623,8 +2422,8 @@ def create_ecs():
     task_def_version = data.get('taskDefVersion')
     container_name = data.get('containerName')
 
-    ecs = boto3.client('ecs', region_name=region)
-    ec2 = boto3.client('ec2', region_name=region)
+    ecs = get_client('ecs', region)
+    ec2 = get_ec2_client(region)
 
     try:
         # 1. Create ECS cluster if not exists
@@ -683,23 +2482,170 @@ def get_ecs_vpcs(region):
 def get_ecs_subnets(region, vpc_id):
     return get_subnets(region, vpc_id)
 
+BILLING_CACHE_PATH = os.getenv('BILLING_CACHE_PATH', './db/billing_cache.sqlite3')
+BILLING_SETTLE_DAYS = int(os.getenv('BILLING_SETTLE_DAYS', '2'))
+BILLING_OPEN_TTL = float(os.getenv('BILLING_OPEN_TTL', '3600'))
+
+class CostCache:
+    """SQLite store of Cost Explorer results, one row per result period.
+
+    A period is final, and kept forever, once it ended more than
+    BILLING_SETTLE_DAYS ago and Cost Explorer no longer flags it Estimated
+    (credits, refunds and amortisation land until the invoice closes).
+    Other periods are reused for BILLING_OPEN_TTL seconds and then fetched
+    again. A period Cost Explorer did not return is stored as None so it is
+    not asked for on every call. The file is shared by every worker process.
+    """
+
+    def __init__(self, path=BILLING_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        return _sqlite_connection(
+            self._local, self.path,
+            'CREATE TABLE IF NOT EXISTS cost_periods ('
+            ' query_key TEXT, period_start TEXT, period_end TEXT,'
+            ' payload TEXT, final INTEGER, fetched_at REAL,'
+            ' PRIMARY KEY (query_key, period_start, period_end))'
+        )
+
+    def get(self, query_key, periods):
+        """{(start, end): result} for the requested periods that are still valid"""
+        rows = self._conn().execute(
+            'SELECT period_start, period_end, payload, final, fetched_at FROM cost_periods'
+            ' WHERE query_key = ? AND period_start >= ? AND period_end <= ?',
+            (query_key, periods[0][0], periods[-1][1])
+        ).fetchall()
+        now = time.time()
+        wanted = set(periods)
+        return {
+            (start, end): json.loads(payload)
+            for start, end, payload, final, fetched_at in rows
+            if (start, end) in wanted and (final or now - fetched_at < BILLING_OPEN_TTL)
+        }
+
+    def put(self, query_key, results):
+        settled = (datetime.datetime.utcnow().date() - datetime.timedelta(days=BILLING_SETTLE_DAYS)).isoformat()
+        now = time.time()
+        with self._conn() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO cost_periods VALUES (?, ?, ?, ?, ?, ?)',
+                [(query_key, start, end, json.dumps(result),
+                  int(end <= settled and not (result or {}).get('Estimated')), now)
+                 for (start, end), result in results.items()]
+            )
+
+cost_cache = CostCache()
+
+def _cost_periods(start, end, granularity):
+    """Split [start, end) into the periods Cost Explorer returns for the granularity"""
+    periods = []
+    day = datetime.date.fromisoformat(start)
+    last = datetime.date.fromisoformat(end)
+    while day < last:
+        if granularity == 'DAILY':
+            period_end = day + datetime.timedelta(days=1)
+        else:
+            period_end = min(last, (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1))
+        periods.append((day.isoformat(), period_end.isoformat()))
+        day = period_end
+    return periods
+
+def _fetch_cost_results(ce, start, end, granularity, metrics, group_by):
+    """{(start, end): ResultsByTime entry} for a range, following NextPageToken"""
+    kwargs = {
+        'TimePeriod': {'Start': start, 'End': end},
+        'Granularity': granularity,
+        'Metrics': metrics
+    }
+    if group_by:
+        kwargs['GroupBy'] = group_by
+    results = {}
+    while True:
+        response = ce.get_cost_and_usage(**kwargs)
+        for entry in response['ResultsByTime']:
+            key = (entry['TimePeriod']['Start'], entry['TimePeriod']['End'])
+            if key in results:
+                # Grouped results for one period can span pages
+                results[key]['Groups'].extend(entry.get('Groups', []))
+            else:
+                results[key] = entry
+        if not response.get('NextPageToken'):
+            return results
+        kwargs['NextPageToken'] = response['NextPageToken']
+
+def cached_cost_and_usage(start, end, granularity='DAILY', metrics=('UnblendedCost',), group_by=(), region=None):
+    """get_cost_and_usage assembled from cached periods, fetching only what is missing.
+
+    group_by is a list of GroupBy dicts, as in the Cost Explorer API.
+    Returns (response, stats): the number of periods served from the cache
+    and the number Cost Explorer returned this call.
+    """
+    metrics = list(metrics)
+    group_by = list(group_by)
+    periods = _cost_periods(start, end, granularity)
+    if not periods:
+        return {'GroupDefinitions': group_by, 'ResultsByTime': [], 'DimensionValueAttributes': []}, {'cached': 0, 'fetched': 0}
+    query_key = json.dumps({'granularity': granularity, 'metrics': metrics, 'group_by': group_by}, sort_keys=True)
+    results = cost_cache.get(query_key, periods)
+    cached_count = len(results)
+
+    # Fetch each contiguous run of missing periods with one (paginated) query
+    missing = [period for period in periods if period not in results]
+    runs = []
+    for period in missing:
+        if runs and runs[-1][1] == period[0]:
+            runs[-1][1] = period[1]
+        else:
+            runs.append([period[0], period[1]])
+    ce = get_client('ce', region)
+    outcomes = _run_parallel({
+        (run_start, run_end): (lambda run_start=run_start, run_end=run_end: _fetch_cost_results(
+            ce, run_start, run_end, granularity, metrics, group_by))
+        for run_start, run_end in runs
+    })
+    fetched = {}
+    for outcome in outcomes.values():
+        if outcome['status'] != 'ok':
+            raise Exception(outcome['error'])
+        fetched.update(outcome['result'])
+    # Remember the periods Cost Explorer left out too, so they aren't re-fetched every call
+    stored = dict.fromkeys(missing)
+    stored.update(fetched)
+    if stored:
+        cost_cache.put(query_key, stored)
+    results.update(stored)
+
+    response = {
+        'GroupDefinitions': group_by,
+        'ResultsByTime': [results[period] for period in periods if results.get(period) is not None],
+        'DimensionValueAttributes': []
+    }
+    return response, {'cached': cached_count, 'fetched': len(fetched)}
+
 @app.route("/api/billing", methods=["GET"])
 def get_billing_data():
+    """Cost and usage for [start, end), served from the persistent cost cache.
+
+    Query params: start, end, granularity (DAILY|MONTHLY), group_by (comma
+    separated dimension keys, default SERVICE; empty for no grouping).
+    """
     try:
         region = request.args.get("region")
         start = request.args.get("start", "2025-06-08")
         end = request.args.get("end", "2025-06-10")
+        granularity = request.args.get("granularity", "DAILY").upper()
+        group_keys = request.args.get("group_by", "SERVICE")
 
-        print(f"Region: {region}, Start: {start}, End: {end}")
+        if granularity not in ('DAILY', 'MONTHLY'):
+            return jsonify({"error": "granularity must be DAILY or MONTHLY"}), 400
 
-        ce_client = boto3.client('ce', region_name=region)
+        print(f"Region: {region}, Start: {start}, End: {end}")
 
-        response = ce_client.get_cost_and_usage(
-            TimePeriod={"Start": start, "End": end},
-            Granularity="DAILY",
-            Metrics=["UnblendedCost"],
-            GroupBy=[{"Type": "DIMENSION", "Key": "SERVICE"}]
-        )
+        group_by = [{"Type": "DIMENSION", "Key": key} for key in group_keys.split(",") if key]
+        response, stats = cached_cost_and_usage(start, end, granularity, group_by=group_by, region=region)
+        response['CacheStats'] = stats
 
         return jsonify(response)
 
@@ -710,44 +2656,67 @@ def get_billing_data():
         print("General Exception:", str(e))
         return jsonify({"error": str(e)}), 500
     
-@app.route('/api/anomaly-summary')
-def anomaly_summary():
-    ce = boto3.client('ce')
-    cad = boto3.client('ce', region_name='us-east-1')
-
-    today = datetime.today()
-    start_mtd = today.replace(day=1).strftime('%Y-%m-%d')
-    end_today = today.strftime('%Y-%m-%d')
+ANOMALY_MTD_TTL = float(os.getenv('ANOMALY_MTD_TTL', '300'))
+anomaly_cache = TTLCache(ANOMALY_MTD_TTL)
 
-    # Spend MTD
+def _month_to_date_spend(ce, start, end):
+    if start == end:
+        return 0.0  # first day of the month, nothing billed yet
     spend_mtd = ce.get_cost_and_usage(
-        TimePeriod={'Start': start_mtd, 'End': end_today},
+        TimePeriod={'Start': start, 'End': end},
         Granularity='MONTHLY',
         Metrics=['UnblendedCost']
     )
-    mtd_total = float(spend_mtd['ResultsByTime'][0]['Total']['UnblendedCost']['Amount'])
+    return sum(float(r['Total']['UnblendedCost']['Amount']) for r in spend_mtd['ResultsByTime'])
+
+def _month_spend(start, end):
+    # Served from the persistent cost cache, so a closed month is fetched once
+    response, _ = cached_cost_and_usage(start, end, 'MONTHLY')
+    return sum(float(r['Total']['UnblendedCost']['Amount']) for r in response['ResultsByTime'])
+
+def _anomalies(cad, start, end):
+    kwargs = {'DateInterval': {'StartDate': start, 'EndDate': end}, 'MaxResults': 100}
+    anomalies = []
+    while True:
+        response = cad.get_anomalies(**kwargs)
+        anomalies.extend(response.get('Anomalies', []))
+        if not response.get('NextPageToken'):
+            return anomalies
+        kwargs['NextPageToken'] = response['NextPageToken']
 
-    # Spend Last Month
-    last_month_start = (today.replace(day=1) - relativedelta(months=1)).strftime('%Y-%m-%d')
-    last_month_end = (today.replace(day=1) - relativedelta(days=1)).strftime('%Y-%m-%d')
+@app.route('/api/anomaly-summary')
+def anomaly_summary():
+    ce = get_client('ce', 'us-east-1')
+
+    today = datetime.datetime.utcnow().date()
+    month_start = today.replace(day=1)
+    start_mtd = month_start.isoformat()
+    end_today = today.isoformat()
+    # Cost Explorer end dates are exclusive
+    last_month_start = (month_start - datetime.timedelta(days=1)).replace(day=1).isoformat()
+
+    # MTD spend and anomalies change during the day, so they get a short TTL;
+    # last month's spend comes from the persistent cost cache
+    outcomes = _run_parallel({
+        'mtd': lambda: anomaly_cache.get_or_load(
+            ('mtd', start_mtd, end_today), lambda: _month_to_date_spend(ce, start_mtd, end_today)),
+        'last_month': lambda: _month_spend(last_month_start, start_mtd),
+        'anomalies': lambda: anomaly_cache.get_or_load(
+            ('anomalies', start_mtd, end_today), lambda: _anomalies(ce, start_mtd, end_today))
+    })
+    errors = {key: outcome['error'] for key, outcome in outcomes.items() if outcome['status'] != 'ok'}
+    if errors:
+        return jsonify({'error': '; '.join(f'{key}: {error}' for key, error in errors.items())}), 500
 
-    spend_last_month = ce.get_cost_and_usage(
-        TimePeriod={'Start': last_month_start, 'End': last_month_end},
-        Granularity='MONTHLY',
-        Metrics=['UnblendedCost']
-    )
-    last_total = float(spend_last_month['ResultsByTime'][0]['Total']['UnblendedCost']['Amount'])
+    mtd_total = outcomes['mtd']['result']
+    last_total = outcomes['last_month']['result']
+    anomalies = outcomes['anomalies']['result']
 
     # Change %
     change = ((mtd_total - last_total) / last_total * 100) if last_total > 0 else 0
 
-    # Anomalies
-    anomalies = cad.get_anomalies(
-        DateInterval={'StartDate': start_mtd, 'EndDate': end_today},
-        MaxResults=100
-    )
-    count = len(anomalies.get('Anomalies', []))
-    impact = sum(float(a['Impact']['TotalImpactAmount']) for a in anomalies.get('Anomalies', []))
+    count = len(anomalies)
+    impact = sum(float(a['Impact']['TotalImpactAmount']) for a in anomalies)
 
     return jsonify({
         "anomaly_count": count,
@@ -774,171 +2743,308 @@ def get_presigned_url():
     except ClientError as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/security/ec2', methods=['GET'])
-def ec2_security_checks():
+# Security check registry. A check is a plain function that takes the run
+# context plus the shared resources it declares in `requires`, and returns the
+# result keys it owns. Resources are fetched at most once per run, however
+# many checks read them, and checks run concurrently.
+SECURITY_RESOURCES = {}
+SECURITY_CHECKS = {}
+SECURITY_CHECK_MAX_WORKERS = int(os.getenv('SECURITY_CHECK_MAX_WORKERS', '8'))
+SECURITY_CHECK_TIMEOUT = float(os.getenv('SECURITY_CHECK_TIMEOUT', '180'))
+
+def security_resource(name):
+    def register(fn):
+        SECURITY_RESOURCES[name] = fn
+        return fn
+    return register
+
+def security_check(suite, requires=()):
+    def register(fn):
+        missing = [name for name in requires if name not in SECURITY_RESOURCES]
+        if missing:
+            raise ValueError(f"Check {fn.__name__} requires unknown resources: {missing}")
+        SECURITY_CHECKS[fn.__name__] = {'suite': suite, 'requires': tuple(requires), 'fn': fn}
+        return fn
+    return register
+
+class CheckContext:
+    """State for one run: the region and the resources fetched so far"""
+
+    def __init__(self, region, **options):
+        self.region = region
+        self.options = options
+        self._resources = {}
+        self._lock = threading.Lock()
+        self._resource_locks = {}
+
+    def resource(self, name):
+        with self._lock:
+            resource_lock = self._resource_locks.setdefault(name, threading.Lock())
+        # Checks asking for the same resource wait for the first fetch
+        with resource_lock:
+            if name not in self._resources:
+                try:
+                    self._resources[name] = ('ok', SECURITY_RESOURCES[name](self))
+                except Exception as e:
+                    self._resources[name] = ('error', e)
+            status, value = self._resources[name]
+        if status == 'error':
+            raise value
+        return value
+
+def run_security_checks(suites, region, **options):
+    """Run every registered check in the given suites; returns {suite: results}"""
+    ctx = CheckContext(region, **options)
+    checks = {name: spec for name, spec in SECURITY_CHECKS.items() if spec['suite'] in suites}
+
+    def task(spec):
+        return spec['fn'](ctx, *[ctx.resource(name) for name in spec['requires']])
+
+    outcomes = _run_parallel(
+        {name: (lambda spec=spec: task(spec)) for name, spec in checks.items()},
+        max_workers=SECURITY_CHECK_MAX_WORKERS,
+        timeout=SECURITY_CHECK_TIMEOUT
+    )
+
+    results = {suite: {'timings_ms': {}} for suite in suites}
+    errors = {suite: {} for suite in suites}
+    for name, spec in checks.items():
+        outcome = outcomes[name]
+        suite_results = results[spec['suite']]
+        if outcome['status'] == 'ok':
+            suite_results.update(outcome['result'])
+            suite_results['timings_ms'][name] = outcome['elapsed_ms']
+        else:
+            errors[spec['suite']][name] = outcome['error']
+
+    for suite in suites:
+        suite_checks = [name for name, spec in checks.items() if spec['suite'] == suite]
+        if suite_checks and len(errors[suite]) == len(suite_checks):
+            # Nothing ran (e.g. bad credentials); report it like a failed call
+            results[suite] = {'error': next(iter(errors[suite].values()))}
+        elif errors[suite]:
+            results[suite]['errors'] = errors[suite]
+    return results
+
+def _security_suite_response(suite):
     region = request.args.get('region', 'us-east-1')
-    results = {
-        "ebs_snapshot_public": "pass",
-        "vpc_default_sg": "pass",
-        "vpc_default_sg_details": []
+    results = run_security_checks([suite], region)[suite]
+    if 'error' in results:
+        return jsonify(results), 500
+    return jsonify(results)
+
+# EC2 resources and checks
+
+@security_resource('vpcs')
+def _vpcs_resource(ctx):
+    return _paginate(get_ec2_client(ctx.region), 'describe_vpcs', 'Vpcs')
+
+@security_resource('default_security_groups')
+def _default_security_groups_resource(ctx):
+    # One query covers the default group of every VPC
+    return _paginate(
+        get_ec2_client(ctx.region), 'describe_security_groups', 'SecurityGroups',
+        Filters=[{'Name': 'group-name', 'Values': ['default']}]
+    )
+
+@security_resource('instances')
+def _instances_resource(ctx):
+    return instance_inventory.instances(ctx.region)
+
+@security_resource('attached_volumes')
+def _attached_volumes_resource(ctx):
+    return _paginate(
+        get_ec2_client(ctx.region), 'describe_volumes', 'Volumes',
+        Filters=[{'Name': 'attachment.status', 'Values': ['attached']}]
+    )
+
+@security_resource('flow_logs')
+def _flow_logs_resource(ctx):
+    return _paginate(get_ec2_client(ctx.region), 'describe_flow_logs', 'FlowLogs')
+
+def _rule_summary(perm):
+    return {
+        "FromPort": perm.get("FromPort"),
+        "ToPort": perm.get("ToPort"),
+        "IpProtocol": perm.get("IpProtocol"),
+        "IpRanges": perm.get("IpRanges"),
+        "Ipv6Ranges": perm.get("Ipv6Ranges"),
+        "UserIdGroupPairs": perm.get("UserIdGroupPairs")
     }
+
+@security_check('ec2')
+def ebs_snapshot_public(ctx):
+    # RestorableByUserIds=all returns only our snapshots that anyone can restore
+    public = _paginate(
+        get_ec2_client(ctx.region), 'describe_snapshots', 'Snapshots',
+        OwnerIds=['self'], RestorableByUserIds=['all']
+    )
+    return {
+        "ebs_snapshot_public": "fail" if public else "pass",
+        "ebs_snapshot_public_details": [snap['SnapshotId'] for snap in public]
+    }
+
+@security_check('ec2', requires=['default_security_groups'])
+def vpc_default_sg(ctx, default_groups):
+    vpc_sg_issues = []
+    for group in default_groups:
+        # Check inbound and outbound rules
+        if group['IpPermissions'] or group['IpPermissionsEgress']:
+            vpc_sg_issues.append({
+                "VpcId": group.get('VpcId'),
+                "GroupId": group['GroupId'],
+                "Region": ctx.region,
+                "FailedInboundRules": [_rule_summary(perm) for perm in group['IpPermissions']],
+                "FailedOutboundRules": [_rule_summary(perm) for perm in group['IpPermissionsEgress']],
+                "Reason": "Default SG has rules"
+            })
+    return {
+        "vpc_default_sg": "fail" if vpc_sg_issues else "pass",
+        "vpc_default_sg_details": vpc_sg_issues
+    }
+
+@security_check('ec2')
+def ebs_default_encryption(ctx):
     try:
-        ec2 = get_ec2_client(region)
-        vpcs = ec2.describe_vpcs()['Vpcs']
-        vpc_sg_issues = []
-        for vpc in vpcs:
-            sg = ec2.describe_security_groups(
-                Filters=[
-                    {'Name': 'vpc-id', 'Values': [vpc['VpcId']]},
-                    {'Name': 'group-name', 'Values': ['default']}
-                ]
-            )['SecurityGroups']
-            for group in sg:
-                # Check inbound and outbound rules
-                if group['IpPermissions'] or group['IpPermissionsEgress']:
-                    # Collect all failed rules
-                    failed_inbound = []
-                    for perm in group['IpPermissions']:
-                        failed_inbound.append({
-                            "FromPort": perm.get("FromPort"),
-                            "ToPort": perm.get("ToPort"),
-                            "IpProtocol": perm.get("IpProtocol"),
-                            "IpRanges": perm.get("IpRanges"),
-                            "Ipv6Ranges": perm.get("Ipv6Ranges"),
-                            "UserIdGroupPairs": perm.get("UserIdGroupPairs")
-                        })
-                    failed_outbound = []
-                    for perm in group['IpPermissionsEgress']:
-                        failed_outbound.append({
-                            "FromPort": perm.get("FromPort"),
-                            "ToPort": perm.get("ToPort"),
-                            "IpProtocol": perm.get("IpProtocol"),
-                            "IpRanges": perm.get("IpRanges"),
-                            "Ipv6Ranges": perm.get("Ipv6Ranges"),
-                            "UserIdGroupPairs": perm.get("UserIdGroupPairs")
-                        })
-                    vpc_sg_issues.append({
-                        "VpcId": vpc['VpcId'],
-                        "GroupId": group['GroupId'],
-                        "Region": region,
-                        "FailedInboundRules": failed_inbound,
-                        "FailedOutboundRules": failed_outbound,
-                        "Reason": "Default SG has rules"
-                    })
-        if vpc_sg_issues:
-            results["vpc_default_sg"] = "fail"
-            results["vpc_default_sg_details"] = vpc_sg_issues
+        encryption = get_ec2_client(ctx.region).get_ebs_encryption_by_default()
+        enabled = encryption.get('EbsEncryptionByDefault', False)
+    except Exception:
+        enabled = False
+    return {"ebs_default_encryption": "pass" if enabled else "fail"}
+
+@security_check('ec2', requires=['instances', 'attached_volumes'])
+def ebs_encrypted(ctx, instances, volumes):
+    # Join the region's attached volumes with the instance inventory in memory
+    attached = {
+        mapping['Ebs']['VolumeId']
+        for inst in instances
+        for mapping in inst.get('BlockDeviceMappings', [])
+        if 'Ebs' in mapping
+    }
+    unencrypted = [vol['VolumeId'] for vol in volumes
+                   if vol['VolumeId'] in attached and not vol.get('Encrypted', False)]
+    return {
+        "ebs_encrypted": "fail" if unencrypted else "pass",
+        "ebs_encrypted_details": unencrypted
+    }
 
-        # 3. Check EBS encryption by default
-        try:
-            encryption = ec2.get_ebs_encryption_by_default()
-            if not encryption.get('EbsEncryptionByDefault', False):
-                results["ebs_default_encryption"] = "fail"
-        except Exception:
-            results["ebs_default_encryption"] = "fail"
-
-        # 4. Check attached EBS volumes encryption
-        instances = ec2.describe_instances()['Reservations']
-        unencrypted = False
-        for res in instances:
-            for inst in res['Instances']:
-                for mapping in inst.get('BlockDeviceMappings', []):
-                    vol_id = mapping['Ebs']['VolumeId']
-                    vol = ec2.describe_volumes(VolumeIds=[vol_id])['Volumes'][0]
-                    if not vol.get('Encrypted', False):
-                        unencrypted = True
-        if unencrypted:
-            results["ebs_encrypted"] = "fail"
-
-        # 5. Check VPC flow logs
-        vpcs = ec2.describe_vpcs()['Vpcs']
-        flow_logs = ec2.describe_flow_logs()['FlowLogs']
-        vpc_with_logs = set(f['ResourceId'] for f in flow_logs if f['ResourceType'] == 'VPC')
-        for vpc in vpcs:
-            if vpc['VpcId'] not in vpc_with_logs:
-                results["vpc_flow_logs"] = "fail"
-
-        return jsonify(results)
+@security_check('ec2', requires=['vpcs', 'flow_logs'])
+def vpc_flow_logs(ctx, vpcs, flow_logs):
+    vpc_with_logs = set(f['ResourceId'] for f in flow_logs if f['ResourceType'] == 'VPC')
+    missing = [vpc['VpcId'] for vpc in vpcs if vpc['VpcId'] not in vpc_with_logs]
+    return {
+        "vpc_flow_logs": "fail" if missing else "pass",
+        "vpc_flow_logs_details": missing
+    }
+
+# S3 resources and checks
+
+S3_SCAN_MAX_WORKERS = int(os.getenv('S3_SCAN_MAX_WORKERS', '16'))
+S3_SCAN_TIMEOUT = float(os.getenv('S3_SCAN_TIMEOUT', '120'))
+ALL_USERS_URI = 'http://acs.amazonaws.com/groups/global/AllUsers'
+S3_BUCKET_CHECKS = ('public_buckets', 'unencrypted_buckets', 'versioning_enabled', 'logging_enabled')
+
+def _bucket_region(s3, bucket_name):
+    location = s3.get_bucket_location(Bucket=bucket_name).get('LocationConstraint')
+    # us-east-1 reports no constraint, and legacy eu-west-1 buckets report 'EU'
+    return {None: 'us-east-1', '': 'us-east-1', 'EU': 'eu-west-1'}.get(location, location)
+
+def _scan_bucket(s3, bucket_name):
+    """Run every per-bucket check in one pass; returns {check: failed}.
+
+    Calls go to a client in the bucket's home region to avoid cross-region
+    redirects. A check that errors (e.g. access denied) stays None, meaning
+    the bucket could not be checked.
+    """
+    try:
+        s3 = get_client('s3', _bucket_region(s3, bucket_name))
+    except Exception:
+        pass  # keep using the listing client
+    failed = dict.fromkeys(S3_BUCKET_CHECKS)
+    try:
+        acl = s3.get_bucket_acl(Bucket=bucket_name)
+        failed["public_buckets"] = any(
+            grant.get('Grantee', {}).get('URI') == ALL_USERS_URI for grant in acl['Grants']
+        )
+    except Exception:
+        pass
+    try:
+        enc = s3.get_bucket_encryption(Bucket=bucket_name)
+        failed["unencrypted_buckets"] = not enc['ServerSideEncryptionConfiguration']['Rules']
     except ClientError as e:
-        return jsonify({'error': str(e)}), 500
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        if e.response['Error']['Code'] == 'ServerSideEncryptionConfigurationNotFoundError':
+            failed["unencrypted_buckets"] = True
+    except Exception:
+        pass
+    try:
+        ver = s3.get_bucket_versioning(Bucket=bucket_name)
+        failed["versioning_enabled"] = ver.get('Status') != 'Enabled'
+    except Exception:
+        pass
+    try:
+        log = s3.get_bucket_logging(Bucket=bucket_name)
+        failed["logging_enabled"] = not log.get('LoggingEnabled')
+    except Exception:
+        pass
+    return failed
 
-@app.route('/security/s3', methods=['GET'])
-def s3_security_checks():
-    region = request.args.get('region', 'us-east-1')
-    results = {
-        "public_buckets": "pass",
-        "unencrypted_buckets": "pass",
-        "versioning_enabled": "pass",
-        "logging_enabled": "pass"
+@security_resource('buckets')
+def _buckets_resource(ctx):
+    return [bucket['Name'] for bucket in get_client('s3', ctx.region).list_buckets()['Buckets']]
+
+@security_resource('bucket_scan')
+def _bucket_scan_resource(ctx):
+    """{bucket: {check: failed}} for every bucket, scanned on a bounded pool.
+
+    A bucket whose scan errors or times out gets None for every check.
+    """
+    s3 = get_client('s3', ctx.region)
+    outcomes = _run_parallel(
+        {name: (lambda name=name: _scan_bucket(s3, name)) for name in ctx.resource('buckets')},
+        max_workers=S3_SCAN_MAX_WORKERS,
+        timeout=S3_SCAN_TIMEOUT
+    )
+    return {
+        name: outcome['result'] if outcome['status'] == 'ok' else dict.fromkeys(S3_BUCKET_CHECKS)
+        for name, outcome in outcomes.items()
     }
-    try:
-        s3 = boto3.client('s3', region_name=region)
-        buckets = s3.list_buckets()['Buckets']
 
-        # 1. Check for public buckets
-        public_buckets = []
-        for bucket in buckets:
-            bucket_name = bucket['Name']
-            try:
-                acl = s3.get_bucket_acl(Bucket=bucket_name)
-                for grant in acl['Grants']:
-                    grantee = grant.get('Grantee', {})
-                    if grantee.get('URI') == 'http://acs.amazonaws.com/groups/global/AllUsers':
-                        public_buckets.append(bucket_name)
-            except Exception:
-                # Skip this bucket if access denied or any error
-                continue
-        if public_buckets:
-            results["public_buckets"] = "fail"
+def _bucket_check(check, scan):
+    """A bucket that could not be checked makes the result 'unknown', never 'pass'"""
+    failing = sorted(name for name, failed in scan.items() if failed.get(check))
+    unscanned = sorted(name for name, failed in scan.items() if failed.get(check) is None)
+    return {
+        check: "fail" if failing else "unknown" if unscanned else "pass",
+        f"{check}_details": failing,
+        f"{check}_unscanned": unscanned,
+        # Shared by every S3 check; they all report the same count
+        "buckets_scanned": len(scan)
+    }
 
-        # 2. Check for unencrypted buckets
-        unencrypted_buckets = []
-        for bucket in buckets:
-            bucket_name = bucket['Name']
-            try:
-                enc = s3.get_bucket_encryption(Bucket=bucket_name)
-                rules = enc['ServerSideEncryptionConfiguration']['Rules']
-                if not rules:
-                    unencrypted_buckets.append(bucket_name)
-            except Exception:
-                # Skip this bucket if access denied or any error
-                continue
-        if unencrypted_buckets:
-            results["unencrypted_buckets"] = "fail"
+@security_check('s3', requires=['bucket_scan'])
+def public_buckets(ctx, scan):
+    return _bucket_check("public_buckets", scan)
 
-        # 3. Check for versioning
-        not_versioned = []
-        for bucket in buckets:
-            bucket_name = bucket['Name']
-            try:
-                ver = s3.get_bucket_versioning(Bucket=bucket_name)
-                if ver.get('Status') != 'Enabled':
-                    not_versioned.append(bucket_name)
-            except Exception:
-                # Skip this bucket if access denied or any error
-                continue
-        if not_versioned:
-            results["versioning_enabled"] = "fail"
+@security_check('s3', requires=['bucket_scan'])
+def unencrypted_buckets(ctx, scan):
+    return _bucket_check("unencrypted_buckets", scan)
 
-        # 4. Check for logging
-        not_logged = []
-        for bucket in buckets:
-            bucket_name = bucket['Name']
-            try:
-                log = s3.get_bucket_logging(Bucket=bucket_name)
-                if not log.get('LoggingEnabled'):
-                    not_logged.append(bucket_name)
-            except Exception:
-                # Skip this bucket if access denied or any error
-                continue
-        if not_logged:
-            results["logging_enabled"] = "fail"
+@security_check('s3', requires=['bucket_scan'])
+def versioning_enabled(ctx, scan):
+    return _bucket_check("versioning_enabled", scan)
+
+@security_check('s3', requires=['bucket_scan'])
+def logging_enabled(ctx, scan):
+    return _bucket_check("logging_enabled", scan)
+
+@app.route('/security/ec2', methods=['GET'])
+def ec2_security_checks():
+    return _security_suite_response('ec2')
+
+@app.route('/security/s3', methods=['GET'])
+def s3_security_checks():
+    return _security_suite_response('s3')
 
-        return jsonify(results)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
 # PCI DSS Security Checks:
 @app.route('/security/pci', methods=['GET'])
 def pci_security_checks():
@@ -947,25 +3053,132 @@ def pci_security_checks():
     Returns: { "ec2": {...}, "s3": {...} }
     """
     region = request.args.get('region', 'us-east-1')
+    return jsonify(run_security_checks(['ec2', 's3'], region))
+
+@app.route('/security/checks', methods=['GET'])
+def list_security_checks():
+    """Registered checks with their suite and declared resources"""
+    return jsonify([
+        {'name': name, 'suite': spec['suite'], 'requires': list(spec['requires'])}
+        for name, spec in SECURITY_CHECKS.items()
+    ])
+
+# Foundation resources and checks
+
+FOUNDATION_CACHE_TTL = float(os.getenv('FOUNDATION_CACHE_TTL', '900'))
+CREDENTIAL_REPORT_TIMEOUT = float(os.getenv('CREDENTIAL_REPORT_TIMEOUT', '30'))
+foundation_cache = TTLCache(FOUNDATION_CACHE_TTL)
+
+def _credential_report(iam):
+    """Generate (if needed) and parse the IAM credential report into row dicts"""
+    deadline = time.monotonic() + CREDENTIAL_REPORT_TIMEOUT
+    while iam.generate_credential_report()['State'] != 'COMPLETE':
+        if time.monotonic() > deadline:
+            raise Exception('Timed out waiting for the IAM credential report')
+        time.sleep(1)
+    content = iam.get_credential_report()['Content']
+    return list(csv.DictReader(io.StringIO(content.decode('utf-8'))))
+
+@security_resource('mfa_status')
+def _mfa_status_resource(ctx):
+    """{'root': bool, 'users': {name: bool}}
+
+    The default 'report' mode reads one credential report; 'api' mode asks
+    IAM per user, which is slow and throttles on large accounts.
+    """
+    iam = get_client('iam')
+    if ctx.options.get('mode') == 'api':
+        root = iam.get_account_summary()['SummaryMap'].get('AccountMFAEnabled', 0) == 1
+        users = {
+            user['UserName']: bool(iam.list_mfa_devices(UserName=user['UserName'])['MFADevices'])
+            for user in _paginate(iam, 'list_users', 'Users')
+        }
+        return {'root': root, 'users': users}
+
+    rows = _credential_report(iam)
+    root = any(row['user'] == '<root_account>' and row['mfa_active'] == 'true' for row in rows)
+    users = {row['user']: row['mfa_active'] == 'true' for row in rows if row['user'] != '<root_account>'}
+    return {'root': root, 'users': users}
+
+@security_check('foundation', requires=['mfa_status'])
+def root_mfa_enabled(ctx, mfa_status):
+    return {"root_mfa_enabled": "pass" if mfa_status['root'] else "fail"}
+
+@security_check('foundation', requires=['mfa_status'])
+def iam_mfa_enabled(ctx, mfa_status):
+    without_mfa = sorted(name for name, enabled in mfa_status['users'].items() if not enabled)
+    return {
+        "iam_mfa_enabled": "fail" if without_mfa else "pass",
+        "iam_mfa_enabled_details": without_mfa
+    }
 
-    # Call the existing functions and get their JSON data
-    with current_app.test_request_context(f'/security/ec2?region={region}'):
-        ec2_resp = ec2_security_checks()
-    with current_app.test_request_context(f'/security/s3?region={region}'):
-        s3_resp = s3_security_checks()
-
-    # If either returns a tuple (response, status), extract response
-    ec2_json = ec2_resp[0] if isinstance(ec2_resp, tuple) else ec2_resp
-    s3_json = s3_resp[0] if isinstance(s3_resp, tuple) else s3_resp
+@security_check('foundation')
+def cloudtrail_enabled(ctx):
+    try:
+        trails = get_client('cloudtrail', ctx.region).describe_trails()['trailList']
+        enabled = any(t.get('HomeRegion') == ctx.region and t.get('IsMultiRegionTrail', False) for t in trails)
+    except Exception:
+        enabled = False
+    return {"cloudtrail_enabled": "pass" if enabled else "fail"}
+
+@security_check('foundation')
+def password_policy_strong(ctx):
+    try:
+        policy = get_client('iam').get_account_password_policy()['PasswordPolicy']
+        strong = (
+            policy.get('MinimumPasswordLength', 0) >= 8 and
+            policy.get('RequireSymbols', False) and
+            policy.get('RequireNumbers', False) and
+            policy.get('RequireUppercaseCharacters', False) and
+            policy.get('RequireLowercaseCharacters', False)
+        )
+    except Exception:
+        strong = False
+    return {"password_policy_strong": "pass" if strong else "fail"}
 
-    return jsonify({
-        "ec2": ec2_json.get_json(),
-        "s3": s3_json.get_json()
-    })
+@security_check('foundation')
+def s3_block_public_access(ctx):
+    try:
+        account_id = get_client('sts').get_caller_identity()['Account']
+        public_access = get_client('s3control').get_public_access_block(
+            AccountId=account_id
+        )['PublicAccessBlockConfiguration']
+        blocked = all(public_access.values())
+    except Exception:
+        blocked = False
+    return {"s3_block_public_access": "pass" if blocked else "fail"}
+
+@security_check('foundation')
+def billing_alerts_enabled(ctx):
+    # Billing metrics only exist in us-east-1; ask for alarms on the total
+    # estimated-charges metric instead of listing every alarm
+    try:
+        alarms = get_cloudwatch_client('us-east-1').describe_alarms_for_metric(
+            Namespace='AWS/Billing',
+            MetricName='EstimatedCharges',
+            Dimensions=[{'Name': 'Currency', 'Value': 'USD'}]
+        )['MetricAlarms']
+    except Exception:
+        alarms = []
+    return {"billing_alerts_enabled": "pass" if alarms else "fail"}
 
 @app.route('/security/foundation', methods=['GET'])
 def aws_foundation_checks():
+    """Foundation checks, cached for FOUNDATION_CACHE_TTL seconds.
+
+    Query params:
+      mode    - 'report' (default) evaluates MFA from the IAM credential report,
+                'api' queries IAM per user
+      refresh - 'true' to ignore the cached result
+    """
     region = request.args.get('region', 'us-east-1')
+    mode = request.args.get('mode', 'report')
+    cache_key = (region, mode)
+    if request.args.get('refresh') != 'true':
+        cached = foundation_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached)
+
     results = {
         "root_mfa_enabled": "unknown",
         "iam_mfa_enabled": "unknown",
@@ -974,75 +3187,15 @@ def aws_foundation_checks():
         "s3_block_public_access": "unknown",
         "billing_alerts_enabled": "unknown"
     }
-    try:
-        # 1. Root account MFA enabled
-        iam = boto3.client('iam')
-        try:
-            summary = iam.get_account_summary()['SummaryMap']
-            mfa_devices = iam.list_mfa_devices(UserName='root')['MFADevices']
-            results["root_mfa_enabled"] = "pass" if mfa_devices else "fail"
-        except Exception:
-            results["root_mfa_enabled"] = "fail"
-
-        # 2. IAM users MFA enabled
-        try:
-            users = iam.list_users()['Users']
-            fail = False
-            for user in users:
-                mfa = iam.list_mfa_devices(UserName=user['UserName'])['MFADevices']
-                if not mfa:
-                    fail = True
-            results["iam_mfa_enabled"] = "fail" if fail else "pass"
-        except Exception:
-            results["iam_mfa_enabled"] = "fail"
-
-        # 3. CloudTrail enabled
-        try:
-            ct = boto3.client('cloudtrail', region_name=region)
-            trails = ct.describe_trails()['trailList']
-            enabled = any(t.get('HomeRegion') == region and t.get('IsMultiRegionTrail', False) for t in trails)
-            results["cloudtrail_enabled"] = "pass" if enabled else "fail"
-        except Exception:
-            results["cloudtrail_enabled"] = "fail"
-
-        # 4. Password policy strong
-        try:
-            policy = iam.get_account_password_policy()['PasswordPolicy']
-            strong = (
-                policy.get('MinimumPasswordLength', 0) >= 8 and
-                policy.get('RequireSymbols', False) and
-                policy.get('RequireNumbers', False) and
-                policy.get('RequireUppercaseCharacters', False) and
-                policy.get('RequireLowercaseCharacters', False)
-            )
-            results["password_policy_strong"] = "pass" if strong else "fail"
-        except Exception:
-            results["password_policy_strong"] = "fail"
-
-        # 5. S3 block public access
-        try:
-            s3 = boto3.client('s3control')
-            account_id = boto3.client('sts').get_caller_identity()['Account']
-            public_access = s3.get_public_access_block(AccountId=account_id)['PublicAccessBlockConfiguration']
-            if all(public_access.values()):
-                results["s3_block_public_access"] = "pass"
-            else:
-                results["s3_block_public_access"] = "fail"
-        except Exception:
-            results["s3_block_public_access"] = "fail"
-
-        # 6. Billing alerts enabled
-        try:
-            cw = boto3.client('cloudwatch', region_name=region)
-            alarms = cw.describe_alarms()['MetricAlarms']
-            billing_alarms = [a for a in alarms if 'Billing' in a.get('AlarmName', '')]
-            results["billing_alerts_enabled"] = "pass" if billing_alarms else "fail"
-        except Exception:
-            results["billing_alerts_enabled"] = "fail"
-
-        return jsonify(results)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    suite = run_security_checks(['foundation'], region, mode=mode)['foundation']
+    if 'error' in suite:
+        return jsonify(suite), 500
+    results.update(suite)
+    results['generated_at'] = datetime.datetime.utcnow().isoformat()
+    # Only complete runs are cached; checks that errored stay "unknown" until retried
+    if 'errors' not in results:
+        foundation_cache.set(cache_key, results)
+    return jsonify(results)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
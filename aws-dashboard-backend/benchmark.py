@@ -0,0 +1,225 @@
+"""Offline benchmark for the dashboard API.
+
+Runs the Flask app against moto's in-process AWS stand-in, seeded with a
+large synthetic estate, and reports per-route latency and AWS call counts.
+No AWS account or network access is needed.
+
+    pip install -r requirement.txt -r requirement-bench.txt
+    python benchmark.py --scale 0.1 --output bench.json
+    python benchmark.py --baseline bench.json   # exits 1 on regression
+
+moto latency is not AWS latency, so compare runs of this script with each
+other. AWS call counts carry over directly: a rise in calls per request is
+a real regression.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BILLING_CACHE_PATH', ':memory:')
+
+from moto import mock_aws
+
+DEFAULT_SIZES = {'instances': 10000, 'buckets': 2000, 'vpcs': 500, 'users': 1000}
+
+
+def seed(boto3, region, sizes):
+    """Create the synthetic estate; returns the instance IDs"""
+    ec2 = boto3.client('ec2', region_name=region)
+    s3 = boto3.client('s3', region_name=region)
+    iam = boto3.client('iam')
+    cw = boto3.client('cloudwatch', region_name=region)
+
+    for i in range(sizes['vpcs']):
+        vpc_id = ec2.create_vpc(CidrBlock=f'10.{i // 256}.{i % 256}.0/24')['Vpc']['VpcId']
+        if i % 10 == 0:
+            # Every tenth default security group gets a rule so the check has findings
+            group = ec2.describe_security_groups(Filters=[
+                {'Name': 'vpc-id', 'Values': [vpc_id]}, {'Name': 'group-name', 'Values': ['default']}
+            ])['SecurityGroups'][0]
+            ec2.authorize_security_group_ingress(
+                GroupId=group['GroupId'], IpProtocol='tcp', FromPort=22, ToPort=22, CidrIp='0.0.0.0/0'
+            )
+
+    # The fleet gets its own VPC with subnets large enough for thousands of instances
+    fleet_vpc = ec2.create_vpc(CidrBlock='172.16.0.0/16')['Vpc']['VpcId']
+    subnets = [
+        ec2.create_subnet(VpcId=fleet_vpc, CidrBlock=f'172.16.{i * 64}.0/18')['Subnet']['SubnetId']
+        for i in range(4)
+    ]
+
+    images = ec2.describe_images()['Images']
+    ami = next((image for image in images if image.get('Platform') != 'windows'), images[0])['ImageId']
+    instance_ids = []
+    remaining = sizes['instances']
+    batch = 0
+    while remaining > 0:
+        count = min(500, remaining)
+        response = ec2.run_instances(
+            ImageId=ami, InstanceType='t3.micro', MinCount=count, MaxCount=count,
+            SubnetId=subnets[batch % len(subnets)],
+            TagSpecifications=[{'ResourceType': 'instance', 'Tags': [{'Key': 'Name', 'Value': f'bench-{batch}'}]}]
+        )
+        instance_ids.extend(inst['InstanceId'] for inst in response['Instances'])
+        remaining -= count
+        batch += 1
+
+    for i in range(sizes['buckets']):
+        name = f'bench-bucket-{i:05d}'
+        if region == 'us-east-1':
+            s3.create_bucket(Bucket=name)
+        else:
+            s3.create_bucket(Bucket=name, CreateBucketConfiguration={'LocationConstraint': region})
+        if i % 2:
+            s3.put_bucket_versioning(Bucket=name, VersioningConfiguration={'Status': 'Enabled'})
+
+    for i in range(sizes['users']):
+        iam.create_user(UserName=f'bench-user-{i:05d}')
+
+    cw.put_metric_alarm(
+        AlarmName='bench-cpu-high', Namespace='AWS/EC2', MetricName='CPUUtilization',
+        Statistic='Average', Period=300, EvaluationPeriods=1, Threshold=80,
+        ComparisonOperator='GreaterThanThreshold',
+        Dimensions=[{'Name': 'InstanceId', 'Value': instance_ids[0]}]
+    )
+    return instance_ids
+
+
+def scenarios(region, instance_ids):
+    """(name, method, path, json body) for every timed route"""
+    fleet = instance_ids[:300]
+    return [
+        ('list_instances', 'get', f'/instances/{region}', None),
+        ('list_instances_stream', 'get', f'/instances/{region}?stream=ndjson', None),
+        ('list_instances_all_regions', 'get', f'/instances/all?regions={region}', None),
+        ('ec2_security_checks', 'get', f'/security/ec2?region={region}', None),
+        ('s3_security_checks', 'get', f'/security/s3?region={region}', None),
+        ('aws_foundation_checks', 'get', f'/security/foundation?region={region}', None),
+        ('instance_metrics', 'get', f'/metrics/{region}/{instance_ids[0]}', None),
+        ('batch_metrics', 'post', '/metrics/batch', {
+            'region': region, 'instance_ids': fleet, 'metrics': ['CPUUtilization', 'NetworkIn']
+        }),
+    ]
+
+
+def aws_call_count(app_module):
+    return sum(
+        sample.value
+        for metric in app_module.AWS_CALLS.collect()
+        for sample in metric.samples
+        if sample.name == 'aws_api_calls_total'
+    )
+
+
+def clear_caches(app_module):
+    app_module.instance_inventory.invalidate()
+    app_module.foundation_cache.invalidate()
+
+
+def run(args):
+    sizes = {key: max(1, int(value * args.scale)) for key, value in DEFAULT_SIZES.items()}
+    for key in DEFAULT_SIZES:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+
+    with mock_aws():
+        import boto3
+        started = time.perf_counter()
+        instance_ids = seed(boto3, args.region, sizes)
+        print(f"Seeded {sizes} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        import app as app_module
+        app_module.reset_aws_clients()
+        client = app_module.app.test_client()
+
+        report = {'sizes': sizes, 'repeat': args.repeat, 'results': {}}
+        for name, method, path, body in scenarios(args.region, instance_ids):
+            clear_caches(app_module)
+            timings = []
+            calls = []
+            status = None
+            for i in range(args.repeat):
+                if args.cold:
+                    clear_caches(app_module)
+                before = aws_call_count(app_module)
+                started = time.perf_counter()
+                response = getattr(client, method)(path, json=body)
+                response.get_data()
+                timings.append((time.perf_counter() - started) * 1000)
+                calls.append(aws_call_count(app_module) - before)
+                status = response.status_code
+            # Background refreshes can race the next scenario's counts
+            time.sleep(0.05)
+            warm = timings[1:] or timings
+            report['results'][name] = {
+                'status': status,
+                'cold_ms': round(timings[0], 1),
+                'p50_ms': round(statistics.median(warm), 1),
+                'p95_ms': round(sorted(warm)[math.ceil(len(warm) * 0.95) - 1], 1),
+                'max_ms': round(max(warm), 1),
+                'cold_aws_calls': int(calls[0]),
+                'warm_aws_calls': round(statistics.mean(calls[1:]), 1) if len(calls) > 1 else None
+            }
+            print(f"{name:28} {json.dumps(report['results'][name])}", file=sys.stderr)
+    return report
+
+
+def compare(report, baseline, tolerance):
+    """Regressions against a previous report: slower beyond tolerance or more AWS calls"""
+    regressions = []
+    for name, result in report['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        for key in ('cold_ms', 'p50_ms'):
+            if result[key] > previous[key] * (1 + tolerance) and result[key] - previous[key] > 5:
+                regressions.append(f"{name}: {key} {previous[key]} -> {result[key]}")
+        for key in ('cold_aws_calls', 'warm_aws_calls'):
+            if previous.get(key) is not None and result.get(key) is not None and result[key] > previous[key]:
+                regressions.append(f"{name}: {key} {previous[key]} -> {result[key]}")
+        if result['status'] != previous['status']:
+            regressions.append(f"{name}: status {previous['status']} -> {result['status']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier for the default estate sizes')
+    parser.add_argument('--instances', type=int)
+    parser.add_argument('--buckets', type=int)
+    parser.add_argument('--vpcs', type=int)
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--region', default='us-east-1')
+    parser.add_argument('--repeat', type=int, default=5, help='requests per route; the first is the cold one')
+    parser.add_argument('--cold', action='store_true', help='clear server-side caches before every request')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--baseline', help='previous JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed latency growth vs. the baseline')
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
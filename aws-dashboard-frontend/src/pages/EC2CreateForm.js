@@ -3,8 +3,8 @@ import axios from 'axios';
 
 function EC2CreateForm({ region }) {
   const [vpcs, setVpcs] = useState([]);
-  const [subnets, setSubnets] = useState([]);
-  const [securityGroups, setSecurityGroups] = useState([]);
+  const [allSubnets, setAllSubnets] = useState([]);
+  const [allSecurityGroups, setAllSecurityGroups] = useState([]);
   const [keyPairs, setKeyPairs] = useState([]);
   const [iamProfiles, setIamProfiles] = useState([]);
 
@@ -25,14 +25,13 @@ function EC2CreateForm({ region }) {
   useEffect(() => {
     const fetchInitialData = async () => {
       try {
-        const [vpcRes, keyPairRes, iamRes] = await Promise.all([
-          axios.get(`/ec2/vpcs/${region}`),
-          axios.get(`/ec2/key-pairs/${region}`),
-          axios.get(`/ec2/iam-profiles/${region}`),
-        ]);
-        setVpcs(vpcRes.data);
-        setKeyPairs(keyPairRes.data);
-        setIamProfiles(iamRes.data);
+        // One request for every lookup the form needs
+        const res = await axios.get(`/ec2/launch-options/${region}`);
+        setVpcs(res.data.vpcs);
+        setAllSubnets(res.data.subnets);
+        setAllSecurityGroups(res.data.security_groups);
+        setKeyPairs(res.data.key_pairs);
+        setIamProfiles(res.data.iam_profiles);
       } catch (err) {
         console.error('Failed to load initial EC2 options', err);
       }
@@ -40,22 +39,12 @@ function EC2CreateForm({ region }) {
     fetchInitialData();
   }, [region]);
 
-  const handleVpcChange = async (e) => {
+  const subnets = allSubnets.filter(subnet => subnet.vpc_id === formData.vpc_id);
+  const securityGroups = allSecurityGroups.filter(sg => sg.vpc_id === formData.vpc_id);
+
+  const handleVpcChange = (e) => {
     const vpc_id = e.target.value;
     setFormData({ ...formData, vpc_id, subnet_id: '', security_group_id: '' });
-
-    if (!vpc_id) return;
-
-    try {
-      const [subnetRes, sgRes] = await Promise.all([
-        axios.get(`/ec2/subnets/${region}/${vpc_id}`),
-        axios.get(`/ec2/security-groups/${region}/${vpc_id}`),
-      ]);
-      setSubnets(subnetRes.data);
-      setSecurityGroups(sgRes.data);
-    } catch (err) {
-      console.error('Failed to load subnets or SGs for selected VPC', err);
-    }
   };
 
   const handleChange = (e) => {
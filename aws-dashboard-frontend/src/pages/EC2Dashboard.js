@@ -512,13 +512,48 @@ function EC2Dashboard({ region = 'us-east-1' }) {
       });
   };
 
+  // Resizes run as background jobs; poll until the job finishes or we give up
+  const pollResizeJob = (jobId, id, newType) => {
+    const maxAttempts = 200; // ~10 minutes at one poll every 3 seconds
+    let attempts = 0;
+    const pollJob = setInterval(async () => {
+      attempts += 1;
+      try {
+        const { data: job } = await axios.get(`${AWS_BACKEND_HOST}/jobs/${jobId}`);
+        if (job.status === 'succeeded') {
+          clearInterval(pollJob);
+          setInstances(prev => prev.map(inst =>
+            inst.id === id ? { ...inst, type: newType, state: 'running' } : inst
+          ));
+          alert(`✅ Instance ${id} resized to ${newType}.`);
+        } else if (job.status === 'failed') {
+          clearInterval(pollJob);
+          const rollback = job.rollback_errors?.length
+            ? `\nRollback problems: ${job.rollback_errors.join('; ')}`
+            : job.rolled_back?.length ? '\nThe instance was restored to its previous type and restarted.' : '';
+          alert(`❌ Resize of ${id} failed at ${job.steps[job.progress.completed]}: ${job.error}${rollback}`);
+        } else if (attempts >= maxAttempts) {
+          clearInterval(pollJob);
+          alert(`Resize of ${id} is still ${job.status} after 10 minutes. Check the instance state.`);
+        }
+      } catch (error) {
+        console.error('Error polling resize job:', error);
+        clearInterval(pollJob);
+        alert('Lost track of the resize job. Check the instance state.');
+      }
+    }, 3000); // Poll every 3 seconds
+  };
+
   const handleResize = (id, type) => {
     const newType = prompt("Enter new instance type:", type);
     if (newType) {
       axios.post(`${AWS_BACKEND_HOST}/instance/${region}/${id}/resize`, {
         instance_type: newType
       })
-      .then(() => alert('Resize requested.'))
+      .then(res => {
+        alert('Resize requested. You will be notified when it finishes.');
+        pollResizeJob(res.data.job_id, id, newType);
+      })
       .catch(err => {
         console.error('Error resizing instance:', err);
         alert('Failed to resize instance. Please try again.');
@@ -30,7 +30,8 @@ function VPCCreateForm({ region }) {
       });
       setMessage(`✅ VPC created: ${res.data.vpc_id}${res.data.subnet_id ? ` | Subnet: ${res.data.subnet_id}` : ''}`);
     } catch (err) {
-      setMessage(`❌ Error: ${err.response?.data?.error || err.message}`);
+      const details = err.response?.data?.errors?.length ? ` (${err.response.data.errors.join('; ')})` : '';
+      setMessage(`❌ Error: ${err.response?.data?.error || err.message}${details}`);
     } finally {
       setLoading(false);
     }